@@ -0,0 +1,390 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+RUN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run.py')
+
+# filter and sort queries of the samples table, as (filter query, sort_by)
+QUERIES = {
+    'page': ('', []),
+    'sort_numeric': ('', [{'column_id': 'WER', 'direction': 'desc'}]),
+    'sort_text': ('', [{'column_id': 'text', 'direction': 'asc'}]),
+    'filter_range': ('{duration} > 5', []),
+    'filter_contains': ('{text} contains w1', []),
+    'filter_sort': ('{WER} > 10 && {duration} < 8', [{'column_id': 'duration', 'direction': 'asc'}]),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks of Speech Data Explorer on a synthetic manifest, results are written as JSON'
+    )
+    parser.add_argument('--rows', type=int, default=100000, help='number of manifest lines')
+    parser.add_argument('--words', type=float, default=12, help='mean number of words of text')
+    parser.add_argument('--vocab-size', type=int, default=5000, help='number of distinct words')
+    parser.add_argument('--error-rate', type=float, default=0.1, help='probability of an error in a word of pred_text')
+    parser.add_argument(
+        '--segments',
+        type=float,
+        default=0.5,
+        help='fraction of lines which are segments of long recordings given by offset and duration',
+    )
+    parser.add_argument(
+        '--audio-files', type=int, default=10, help='number of short utterances and of long recordings'
+    )
+    parser.add_argument('--long-duration', type=float, default=300, help='duration of long recordings in seconds')
+    parser.add_argument('--sample-rate', type=int, default=16000, help='sample rate of audio files')
+    parser.add_argument('--audio-format', choices=['wav', 'flac'], default='wav', help='format of audio files')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='number of worker processes of run.py')
+    parser.add_argument('--streaming', action='store_true', help='load the manifest in streaming mode')
+    parser.add_argument(
+        '--changed', type=float, default=0.01, help='fraction of lines changed before the incremental load'
+    )
+    parser.add_argument('--repeats', type=int, default=20, help='number of measurements of each query and callback')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generator')
+    parser.add_argument('--work-dir', help='directory of generated manifest and audio, temporary if not given')
+    parser.add_argument('--output', '-o', help='JSON file of results, they are printed if not given')
+    # internal: measure a scenario in a fresh process and write its results into a file
+    parser.add_argument('--measure', nargs=2, metavar=('SCENARIO', 'RESULT'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# harmonic tone with amplitude modulation and noise, so that spectrograms and bandwidth are not trivial
+def synthetic_audio(rng, num_samples, sr):
+    t = np.arange(num_samples) / sr
+    f0 = rng.uniform(100, 300)
+    signal = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    signal *= 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(1, 4) * t)
+    signal += rng.normal(0, 0.05, num_samples)
+    return (0.3 * signal / np.max(np.abs(signal))).astype(np.float32)
+
+
+# write audio files and a manifest which refers to them, audio paths are relative to the manifest,
+# lines are whole short utterances or segments of long recordings
+def generate(args, work_dir):
+    rng = np.random.default_rng(args.seed)
+    os.makedirs(os.path.join(work_dir, 'audio'), exist_ok=True)
+    sr = args.sample_rate
+    utterances = []
+    recordings = []
+    for kind, files in [('utterance', utterances), ('recording', recordings)]:
+        for i in range(args.audio_files):
+            duration = rng.uniform(1, 15) if kind == 'utterance' else args.long_duration
+            num_samples = int(duration * sr)
+            path = 'audio/{}_{}.{}'.format(kind, i, args.audio_format)
+            sf.write(os.path.join(work_dir, path), synthetic_audio(rng, num_samples, sr), sr, subtype='PCM_16')
+            files.append((path, num_samples / sr))
+
+    # Zipf distribution of words, all words are sampled at once
+    weights = 1.0 / np.arange(1, args.vocab_size + 1)
+    weights /= weights.sum()
+    num_words = np.maximum(rng.poisson(args.words, args.rows), 1)
+    word_ids = rng.choice(args.vocab_size, int(num_words.sum()), p=weights).tolist()
+    errors = rng.random(len(word_ids)).tolist()
+    error_kinds = rng.integers(0, 3, len(word_ids)).tolist()
+    error_words = rng.choice(args.vocab_size, len(word_ids), p=weights).tolist()
+    is_segment = (rng.random(args.rows) < args.segments).tolist()
+    file_ids = rng.integers(0, args.audio_files, args.rows).tolist()
+    segment_durations = rng.uniform(1, 15, args.rows).tolist()
+    segment_starts = rng.random(args.rows).tolist()
+
+    pos = 0
+    with open(os.path.join(work_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        for i in range(args.rows):
+            text = []
+            pred = []
+            for j in range(pos, pos + int(num_words[i])):
+                word = 'w{}'.format(word_ids[j])
+                text.append(word)
+                if errors[j] >= args.error_rate:
+                    pred.append(word)
+                elif error_kinds[j] == 0:
+                    # substitution
+                    pred.append('w{}'.format(error_words[j]))
+                elif error_kinds[j] == 1:
+                    # insertion, deletions leave the word out
+                    pred += [word, 'w{}'.format(error_words[j])]
+            pos += int(num_words[i])
+            if is_segment[i]:
+                path, length = recordings[file_ids[i]]
+                duration = min(segment_durations[i], length)
+                item = {
+                    'audio_filepath': path,
+                    'offset': round(segment_starts[i] * (length - duration), 3),
+                    'duration': round(duration, 3),
+                }
+            else:
+                path, length = utterances[file_ids[i]]
+                item = {'audio_filepath': path, 'duration': length}
+            item['text'] = ' '.join(text)
+            item['pred_text'] = ' '.join(pred)
+            f.write(json.dumps(item) + '\n')
+
+
+# change predictions of a fraction of manifest lines, so that the next load recomputes metrics of these lines only
+def change_manifest(manifest, fraction, seed):
+    rng = np.random.default_rng(seed + 1)
+    with open(manifest, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for i in rng.choice(len(lines), int(len(lines) * fraction), replace=False).tolist():
+        item = json.loads(lines[i])
+        item['pred_text'] += ' changed'
+        lines[i] = json.dumps(item) + '\n'
+    with open(manifest, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+
+# import run.py with given command line, the app is created but the server is not started
+def import_run(argv):
+    spec = importlib.util.spec_from_file_location('run', RUN_PATH)
+    run = importlib.util.module_from_spec(spec)
+    # worker processes find functions of run.py by module name
+    sys.modules['run'] = run
+    spec.loader.exec_module(run)
+    run.configure(argv)
+    return run
+
+
+def latency_stats(seconds):
+    ms = np.array(seconds) * 1000.0
+    return {
+        'count': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+        'ops_per_sec': float(len(ms) / ms.sum() * 1000.0) if ms.sum() > 0 else None,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+# call a Dash callback through the update endpoint of the app like the browser does, callbacks which use
+# callback context can not be called directly
+def dispatch(client, output, outputs, inputs, changed):
+    body = {'output': output, 'outputs': outputs, 'inputs': inputs, 'changedPropIds': changed, 'state': []}
+    response = client.post('/_dash-update-component', json=body)
+    if response.status_code not in (200, 204):
+        raise RuntimeError('callback {} failed with status {}'.format(output, response.status_code))
+    return response
+
+
+def pattern_output(pattern, prop):
+    wildcards = {k: ['ALL'] if v is None else v for k, v in pattern.items()}
+    return json.dumps(wildcards, sort_keys=True, separators=(',', ':')) + '.' + prop
+
+
+def pattern_outputs(pattern, key, values, prop):
+    return [{'id': dict(pattern, **{key: value}), 'property': prop} for value in values]
+
+
+# latency of table queries, histograms and per-row callbacks of the loaded app
+def measure_interactive(run, args):
+    rng = np.random.default_rng(args.seed)
+    results = {'queries': {}, 'histograms': {}, 'callbacks': {}}
+
+    for name, (filter_query, sort_by) in QUERIES.items():
+        uncached = []
+        cached = []
+        for i in range(args.repeats):
+            # fresh query state, so that filtering and sorting are not memoized
+            run.data_query = run.TableQuery(run.data)
+            uncached.append(timed(run.update_datatable, int(rng.integers(0, 10)), sort_by, filter_query)[0])
+        for i in range(args.repeats):
+            # page flips of the memoized query
+            cached.append(timed(run.update_datatable, i, sort_by, filter_query)[0])
+        results['queries'][name] = {'uncached': latency_stats(uncached), 'cached': latency_stats(cached)}
+
+    numeric = [k for k in run.data.keys() if run.data.is_numeric(k)]
+    results['histograms']['compute'] = latency_stats(
+        [timed(lambda: {k: run.compute_histogram(run.data[k]) for k in numeric})[0] for _ in range(args.repeats)]
+    )
+    results['histograms']['figures'] = latency_stats([timed(run.make_figures_hist)[0] for _ in range(args.repeats)])
+
+    client = run.app.server.test_client()
+    hist_outputs = pattern_outputs({'type': 'hist', 'column': None}, 'column', list(run.figures_hist), 'figure')
+    metrics = ['wer', 'cer', 'wmr', 'mwa'] if run.metrics_available else []
+    model_outputs = [
+        {'id': {'type': 'model-metric', 'model': name, 'metric': metric}, 'property': 'children'}
+        for name, _ in (run.models_row_stats() if run.models else [])
+        for metric in ['wer', 'cer', 'wmr']
+    ]
+    stats_output = '..{}..'.format(
+        '...'.join(
+            [
+                'stats-title.children',
+                'stats-hours.children',
+                'stats-utterances.children',
+                pattern_output({'type': 'stats-metric', 'metric': None}, 'children'),
+                pattern_output({'type': 'hist', 'column': None}, 'figure'),
+                pattern_output({'type': 'model-metric', 'model': None, 'metric': None}, 'children'),
+            ]
+        )
+    )
+    stats_outputs = [
+        {'id': 'stats-title', 'property': 'children'},
+        {'id': 'stats-hours', 'property': 'children'},
+        {'id': 'stats-utterances', 'property': 'children'},
+        pattern_outputs({'type': 'stats-metric', 'metric': None}, 'metric', metrics, 'children'),
+        hist_outputs,
+        model_outputs,
+    ]
+    filtered_stats = []
+    for i in range(args.repeats):
+        run.stats_query = run.TableQuery(run.data)
+        filter_query = '{{duration}} > {}'.format(i % 10)
+        inputs = [{'id': 'data-filter', 'property': 'data', 'value': filter_query}]
+        filtered_stats.append(timed(dispatch, client, stats_output, stats_outputs, inputs, ['data-filter.data'])[0])
+    results['callbacks']['update_stats'] = latency_stats(filtered_stats)
+
+    # different rows, so that audio is decoded for every call, then the same row from the audio cache
+    indices = rng.choice(len(run.data), min(args.repeats, len(run.data)), replace=False).tolist()
+    rows = run.data.rows(indices)
+    for idx, row in zip(indices, rows):
+        row[run.ROW_INDEX_KEY] = idx
+    item_outputs = pattern_outputs({'type': 'item-value', 'column': None}, 'column', run.data.keys(), 'children')
+    diff_columns = (['pred_text'] if run.metrics_available else []) + [model['pred'] for model in run.models]
+    diff_outputs = pattern_outputs({'type': 'diff', 'column': None}, 'column', diff_columns, 'srcDoc')
+    signal_outputs = {'id': 'signal-graph', 'property': 'figure'}
+    timings = {k: [] for k in ['show_item', 'show_diff', 'plot_signal', 'plot_signal_cached', 'serve_audio']}
+    for row in rows:
+        inputs = [
+            {'id': 'datatable', 'property': 'selected_rows', 'value': [0]},
+            {'id': 'datatable', 'property': 'data', 'value': [row]},
+        ]
+        signal_inputs = inputs + [{'id': 'signal-graph', 'property': 'relayoutData', 'value': None}]
+        changed = ['datatable.selected_rows']
+        item_output = pattern_output({'type': 'item-value', 'column': None}, 'children')
+        timings['show_item'].append(timed(dispatch, client, item_output, item_outputs, inputs, changed)[0])
+        if diff_columns:
+            diff_output = pattern_output({'type': 'diff', 'column': None}, 'srcDoc')
+            timings['show_diff'].append(timed(dispatch, client, diff_output, diff_outputs, inputs, changed)[0])
+        timings['plot_signal'].append(
+            timed(dispatch, client, 'signal-graph.figure', signal_outputs, signal_inputs, changed)[0]
+        )
+        timings['plot_signal_cached'].append(
+            timed(dispatch, client, 'signal-graph.figure', signal_outputs, signal_inputs, changed)[0]
+        )
+        url = '/audio/{}?format={}'.format(row[run.ROW_INDEX_KEY], run.args.audio_format)
+        timings['serve_audio'].append(timed(client.get, url)[0])
+    for k, seconds in timings.items():
+        if seconds:
+            results['callbacks'][k] = latency_stats(seconds)
+    results['callbacks']['audio_cache'] = run.audio_cache.stats()
+    return results
+
+
+# load the manifest by run.py in this process and measure it, the warm load also measures the loaded app
+def measure_scenario(args, scenario, result_path):
+    manifest = os.path.join(args.work_dir, 'manifest.json')
+    argv = [manifest, '--workers', str(args.workers)] + (['--streaming'] if args.streaming else [])
+    import_seconds, run = timed(import_run, argv)
+    load_seconds, _ = timed(run.load_app_data)
+    if not run.loading_progress.ready:
+        raise RuntimeError(run.loading_progress.error)
+    result = {
+        'import_seconds': import_seconds,
+        'load_seconds': load_seconds,
+        'rows': len(run.data),
+        'rows_per_sec': len(run.data) / load_seconds,
+        'peak_rss_mb': run.peak_memory(),
+    }
+    if scenario == 'warm':
+        result.update(measure_interactive(run, args))
+        result['peak_rss_mb_interactive'] = run.peak_memory()
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+# every scenario runs in a fresh process, so that loads are cold and peak memory is measured per scenario
+def run_scenario(args, scenario, work_dir):
+    fd, result_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    command = [sys.executable, os.path.abspath(__file__), '--measure', scenario, result_path, '--work-dir', work_dir]
+    command += ['--workers', str(args.workers), '--repeats', str(args.repeats), '--seed', str(args.seed)]
+    if args.streaming:
+        command.append('--streaming')
+    try:
+        process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            raise RuntimeError('{} load failed:\n{}'.format(scenario, process.stderr[-4000:]))
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def main():
+    args = parse_args()
+    if args.measure:
+        measure_scenario(args, *args.measure)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='sde_benchmark_')
+    try:
+        print('Generating {} lines in {}...'.format(args.rows, work_dir), file=sys.stderr)
+        generate_seconds, _ = timed(generate, args, work_dir)
+        manifest = os.path.join(work_dir, 'manifest.json')
+        results = {}
+        for scenario in ['cold', 'warm', 'incremental']:
+            if scenario == 'cold':
+                shutil.rmtree(os.path.join(work_dir, 'manifest_sde_cache'), ignore_errors=True)
+            elif scenario == 'incremental':
+                change_manifest(manifest, args.changed, args.seed)
+            print('Measuring {} load...'.format(scenario), file=sys.stderr)
+            results[scenario] = run_scenario(args, scenario, work_dir)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    config = {k: v for k, v in vars(args).items() if k not in ['measure', 'output', 'work_dir']}
+    report = {
+        'config': config,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'generate_seconds': generate_seconds,
+        'manifest_bytes': os.path.getsize(manifest) if args.work_dir else None,
+        'load': {k: {m: v for m, v in r.items() if not isinstance(v, dict)} for k, r in results.items()},
+    }
+    report.update({k: v for k, v in results['warm'].items() if isinstance(v, dict)})
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
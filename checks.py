@@ -0,0 +1,255 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import difflib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import urllib.parse
+
+import numpy as np
+
+import benchmark
+
+# the metrics check compares with the implementation which used these packages
+try:
+    import editdistance
+    import jiwer
+except ImportError:
+    editdistance = None
+    jiwer = None
+
+# filter and sort of the exported samples
+EXPORT_FILTER = '{WER} > 10'
+EXPORT_SORT = ('duration', 'desc')
+
+# WER, CER, WMR, I, D and D-I are the same as computed with jiwer and editdistance, while word accuracy counts words
+# matched by the Levenshtein alignment instead of the matching blocks of difflib and is allowed to differ, the drift
+# grows with errors: error rate of pred_text of a manifest -> (largest fraction of word occurrences of the manifest
+# which are matched differently, largest difference of mean word accuracy in percentage points)
+METRICS_DRIFT = {0.1: (0.002, 0.3), 0.3: (0.01, 1.0)}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Consistency checks of Speech Data Explorer on a synthetic manifest')
+    parser.add_argument('checks', nargs='*', help='checks to run: {}, all if not given'.format(', '.join(CHECKS)))
+    parser.add_argument('--rows', type=int, default=2000, help='number of manifest lines')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generator')
+    return parser.parse_args()
+
+
+# synthetic manifest of benchmark.py with fields of other JSON types: objects, lists, an integer field missing in
+# some lines, non-ASCII strings written with and without escaping, and empty lines between manifest lines
+def generate(args, work_dir, error_rate=0.1):
+    config = argparse.Namespace(
+        rows=args.rows,
+        words=12,
+        vocab_size=1000,
+        error_rate=error_rate,
+        segments=0.5,
+        audio_files=2,
+        long_duration=20,
+        sample_rate=8000,
+        audio_format='wav',
+        seed=args.seed,
+    )
+    benchmark.generate(config, work_dir)
+    manifest = os.path.join(work_dir, 'manifest.json')
+    with open(manifest, 'r', encoding='utf-8') as f:
+        items = [json.loads(line) for line in f]
+    with open(manifest, 'w', encoding='utf-8') as f:
+        for i, item in enumerate(items):
+            if i % 3:
+                item['score'] = i
+            item['meta'] = {'speaker': i % 7, 'gain': 0.5, 'name': 'sprecher_ä'}
+            item['tags'] = ['read', i % 2 == 0, None]
+            if i % 5 == 0:
+                item['text'] += ' über'
+                item['pred_text'] += ' über'
+            f.write(json.dumps(item, ensure_ascii=i % 2 == 0) + '\n')
+            if i % 11 == 0:
+                f.write('\n')
+    return manifest
+
+
+# loaded app of run.py for given command line
+def load_run(argv):
+    run = benchmark.import_run(argv)
+    run.load_app_data()
+    if not run.loading_progress.ready:
+        raise RuntimeError(run.loading_progress.error)
+    return run
+
+
+def values_equal(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+# JSON lines of filtered and sorted samples are the manifest lines of the rows as they are written, and the exported
+# file loaded again gives the same rows, for manifests loaded with and without the metrics cache, in streaming mode
+# and from a binary dataset
+def check_export(args, work_dir):
+    manifest = generate(args, work_dir)
+    with open(manifest, 'rb') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    dataset = os.path.join(work_dir, 'manifest.sde')
+    subprocess.run([sys.executable, benchmark.RUN_PATH, manifest, '--convert', dataset], check=True)
+    exported = os.path.join(work_dir, 'exported.json')
+    query = urllib.parse.urlencode({'filter': EXPORT_FILTER, 'sort': EXPORT_SORT[0], 'direction': EXPORT_SORT[1]})
+    for mode, argv in [
+        ('cached', [manifest]),
+        ('cached, warm', [manifest]),
+        ('streaming', [manifest, '--streaming']),
+        ('without cache', [manifest, '--disable-caching-metrics']),
+        ('dataset', [dataset]),
+    ]:
+        run = load_run(argv)
+        sort_by = [{'column_id': EXPORT_SORT[0], 'direction': EXPORT_SORT[1]}]
+        indices = run.TableQuery(run.data).all(EXPORT_FILTER, sort_by)
+        response = run.app.server.test_client().get('/export/samples.jsonl?' + query)
+        assert response.status_code == 200, response.status_code
+        with open(exported, 'wb') as f:
+            f.write(response.data)
+        rows = [line for line in response.data.split(b'\n') if line]
+        assert len(indices) > 0 and len(rows) == len(indices), (mode, len(rows), len(indices))
+        for idx, row in zip(indices.tolist(), rows):
+            assert row == lines[idx], (mode, idx)
+            original = json.dumps(json.loads(lines[idx]), sort_keys=True)
+            assert json.dumps(json.loads(row), sort_keys=True) == original, (mode, idx)
+
+        store = run.ColumnStore(dict(run.data.columns, duration=run.row_stats['duration']))
+        reloaded = load_run([exported, '--disable-caching-metrics'])
+        reloaded_store = reloaded.ColumnStore(dict(reloaded.data.columns, duration=reloaded.row_stats['duration']))
+        assert sorted(store.keys()) == sorted(reloaded_store.keys()), mode
+        positions = np.arange(len(indices))
+        for k in store.keys():
+            expected = store.column_values(k, indices)
+            actual = reloaded_store.column_values(k, positions)
+            assert all(values_equal(a, b) for a, b in zip(expected, actual)), (mode, k)
+        print('export ({}): {} exported rows are the manifest lines and load as the same rows'.format(mode, len(rows)))
+
+
+# metrics of manifest lines as they were computed with jiwer, editdistance and difflib, lines with empty text are
+# left out as jiwer does not accept them, returns rows of (WER, CER, WMR, I, D, D-I), aggregated WER, CER and WMR,
+# word counts and counts of words in matching blocks of difflib
+def reference_metrics(manifest):
+    rows = []
+    wer_dist = wer_count = cer_dist = cer_count = wmr_count = 0
+    vocabulary = {}
+    match_vocab = {}
+    sm = difflib.SequenceMatcher()
+    with open(manifest, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            orig = item['text'].split()
+            pred = item['pred_text'].split()
+            num_words = len(orig)
+            num_chars = len(item['text'])
+            for word in orig:
+                vocabulary[word] = vocabulary.get(word, 0) + 1
+            measures = jiwer.compute_measures(item['text'], item['pred_text'])
+            word_dist = measures['substitutions'] + measures['insertions'] + measures['deletions']
+            char_dist = editdistance.eval(item['text'], item['pred_text'])
+            wer_dist += word_dist
+            cer_dist += char_dist
+            wer_count += num_words
+            cer_count += num_chars
+            wmr_count += measures['hits']
+            sm.set_seqs(orig, pred)
+            for m in sm.get_matching_blocks():
+                for word_idx in range(m[0], m[0] + m[2]):
+                    match_vocab[orig[word_idx]] = match_vocab.get(orig[word_idx], 0) + 1
+            rows.append(
+                (
+                    round(word_dist / num_words * 100.0, 2),
+                    round(char_dist / num_chars * 100.0, 2),
+                    round(measures['hits'] / num_words * 100.0, 2),
+                    measures['insertions'],
+                    measures['deletions'],
+                    measures['deletions'] - measures['insertions'],
+                )
+            )
+    totals = (wer_dist / wer_count * 100.0, cer_dist / cer_count * 100.0, wmr_count / wer_count * 100.0)
+    return rows, totals, vocabulary, match_vocab
+
+
+# per-row and aggregated metrics are the same as computed with jiwer and editdistance, word accuracy and mean word
+# accuracy differ from the ones of difflib matching blocks within METRICS_DRIFT
+def check_metrics(args, work_dir):
+    if jiwer is None:
+        sys.exit('the metrics check needs jiwer and editdistance: pip install jiwer editdistance')
+    for error_rate, (max_matched_drift, max_mwa_drift) in METRICS_DRIFT.items():
+        manifest = generate(args, os.path.join(work_dir, str(error_rate)), error_rate)
+        rows, totals, vocabulary, match_vocab = reference_metrics(manifest)
+        run = load_run([manifest])
+        columns = ['WER', 'CER', 'WMR', 'I', 'D', 'D-I']
+        positions = np.arange(len(run.data))
+        actual = list(zip(*[run.data.column_values(k, positions) for k in columns]))
+        assert len(actual) == len(rows), (len(actual), len(rows))
+        for i, (expected_row, row) in enumerate(zip(rows, actual)):
+            assert tuple(row) == expected_row, (error_rate, i, expected_row, row)
+        assert (run.wer, run.cer, run.wmr) == totals, (error_rate, (run.wer, run.cer, run.wmr), totals)
+
+        words = run.vocabulary.column_values('word', np.arange(len(run.vocabulary)))
+        assert sorted(words) == sorted(vocabulary), error_rate
+        accuracy = dict(zip(words, run.vocabulary['accuracy'].tolist()))
+        # counts of matched words are kept in the metrics cache
+        cached = run.ColumnStore.load(os.path.join(run.metrics_cache_dir(manifest), 'vocabulary'))
+        cached_words = cached.column_values('word', np.arange(len(cached)))
+        matched = dict(zip(cached_words, cached['match'].tolist()))
+        reference_accuracy = {w: match_vocab.get(w, 0) / count * 100.0 for w, count in vocabulary.items()}
+        drift_words = sum(abs(matched[w] - match_vocab.get(w, 0)) for w in vocabulary)
+        changed = sum(accuracy[w] != round(reference_accuracy[w], 1) for w in vocabulary)
+        reference_mwa = sum(reference_accuracy.values()) / len(vocabulary)
+        num_words = sum(vocabulary.values())
+        print(
+            'metrics (error rate {}): {} rows and aggregated metrics are the same, accuracy of {} of {} words differs, '
+            '{} of {} matched words ({:.3%}), mean word accuracy {:.2f} instead of {:.2f}'.format(
+                error_rate, len(rows), changed, len(vocabulary), drift_words, num_words, drift_words / num_words,
+                run.mwa, reference_mwa
+            )
+        )
+        assert drift_words <= max_matched_drift * num_words, (error_rate, drift_words, num_words)
+        assert abs(run.mwa - reference_mwa) <= max_mwa_drift, (error_rate, run.mwa, reference_mwa)
+
+
+CHECKS = {'export': check_export, 'metrics': check_metrics}
+
+
+def main():
+    args = parse_args()
+    for name in args.checks:
+        if name not in CHECKS:
+            sys.exit('unknown check {}'.format(name))
+    work_dir = tempfile.mkdtemp(prefix='sde_checks_')
+    try:
+        for name in args.checks or list(CHECKS):
+            check_dir = os.path.join(work_dir, name)
+            os.makedirs(check_dir)
+            CHECKS[name](args, check_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
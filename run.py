@@ -13,39 +13,67 @@
 # limitations under the License.
 
 import argparse
-import base64
+import bisect
+import cProfile
 import csv
-import datetime
-import difflib
+import functools
+import hashlib
 import io
 import json
 import math
+import mmap
+import multiprocessing
 import operator
 import os
-import pickle
-from collections import defaultdict
+import pstats
+import re
+import shlex
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
 from os.path import expanduser
 from pathlib import Path
 
 import dash
 import dash_bootstrap_components as dbc
 import diff_match_patch
-import editdistance
-import jiwer
+import flask
 import librosa
 import numpy as np
 import soundfile as sf
 import tqdm
 from dash import dash_table, dcc, html
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ALL, Input, Output
 from dash.exceptions import PreventUpdate
-from plotly import express as px
 from plotly import graph_objects as go
 from plotly.subplots import make_subplots
+from rapidfuzz.distance import Levenshtein
+
+try:
+    import fcntl
+    import resource
+except ImportError:
+    # not available on Windows
+    fcntl = None
+    resource = None
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # Parquet export is optional
+    pyarrow = None
 
 # number of items in a table per page
 DATA_PAGE_SIZE = 10
 
+# columns with inverted index for substring filters
+TEXT_INDEX_COLUMNS = ['text', 'pred_text', 'audio_filepath']
+
 # operators for filtering items
 filter_operators = {
     '>=': 'ge',
@@ -67,6 +95,9 @@ def split_filter_part(filter_part):
             v0 = value_part[0]
             if v0 == value_part[-1] and v0 in ("'", '"', '`'):
                 value = value_part[1:-1].replace('\\' + v0, v0)
+            elif op == 'contains ':
+                # substring queries always search for text
+                value = value_part
             else:
                 try:
                     value = float(value_part)
@@ -76,37 +107,771 @@ def split_filter_part(filter_part):
     return [None] * 3
 
 
+# memory-map file for reading, empty files can not be mapped
+def map_file(filename):
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# compact storage of strings: UTF-8 encoded values concatenated into one buffer plus offsets of each value
+class StringColumn:
+    def __init__(self, values=()):
+        encoded = [value.encode('utf8') for value in values]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=self.offsets[1:])
+        self.buffer = b''.join(encoded)
+
+    @classmethod
+    def concatenate(cls, columns):
+        result = cls()
+        result.buffer = b''.join(column.buffer for column in columns)
+        offsets = [result.offsets[:1]]
+        shift = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + shift)
+            shift += column.offsets[-1]
+        result.offsets = np.concatenate(offsets)
+        return result
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.buffer[self.offsets[idx] : self.offsets[idx + 1]].decode('utf8')
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def take(self, indices):
+        return [self[idx] for idx in indices]
+
+    # new column with values at given positions, contiguous runs of positions are copied at once
+    def select(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        result = StringColumn()
+        if not len(indices):
+            return result
+        breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+        starts = np.r_[0, breaks]
+        ends = np.r_[breaks, len(indices)]
+        result.buffer = b''.join(
+            self.buffer[self.offsets[indices[s]] : self.offsets[indices[e - 1] + 1]] for s, e in zip(starts, ends)
+        )
+        result.offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(self.offsets[indices + 1] - self.offsets[indices], out=result.offsets[1:])
+        return result
+
+    def save(self, prefix):
+        with open(prefix + '.bin', 'wb') as f:
+            f.write(self.buffer)
+        np.save(prefix + '.offsets.npy', self.offsets)
+
+    # load column saved by save(), the buffer is memory-mapped
+    @classmethod
+    def load(cls, prefix):
+        column = cls()
+        column.buffer = map_file(prefix + '.bin')
+        column.offsets = np.load(prefix + '.offsets.npy', mmap_mode='r')
+        return column
+
+    # mask of values containing substring, searches the whole buffer instead of decoding every value
+    def contains(self, substring):
+        mask = np.zeros(len(self), dtype=bool)
+        pattern = substring.encode('utf8')
+        if not pattern:
+            mask[:] = True
+            return mask
+        pos = self.buffer.find(pattern)
+        while pos >= 0:
+            idx = int(np.searchsorted(self.offsets, pos, side='right')) - 1
+            end = self.offsets[idx + 1]
+            if pos + len(pattern) <= end:
+                mask[idx] = True
+            # a match in the value is enough, continue from the next value
+            pos = self.buffer.find(pattern, end)
+        return mask
+
+
+# string column of a manifest field, values stay in the memory-mapped manifest and are parsed on demand,
+# rows are the manifest lines starting at given byte offsets
+class ManifestColumn(StringColumn):
+    def __init__(self, key, buffer, starts):
+        self.key = key
+        self.buffer = buffer
+        self.starts = starts
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, idx):
+        start = self.starts[idx]
+        end = self.buffer.find(b'\n', start)
+        return column_string(json.loads(self.buffer[start : end if end >= 0 else len(self.buffer)]).get(self.key))
+
+    def select(self, indices):
+        return ManifestColumn(self.key, self.buffer, self.starts[np.asarray(indices, dtype=np.int64)])
+
+    # values stay in the manifest, an empty value is saved for every row
+    def save(self, prefix):
+        empty = StringColumn()
+        empty.offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        empty.save(prefix)
+
+    # mask of values containing substring, only lines which contain it as it is encoded in JSON are parsed: as UTF-8
+    # (values which are not strings), escaped as a string, with non-ASCII characters escaped (ensure_ascii, the default
+    # of json.dump) in lower or upper case hex
+    def contains(self, substring):
+        mask = np.zeros(len(self), dtype=bool)
+        if not substring:
+            mask[:] = True
+            return mask
+        order = np.argsort(self.starts, kind='stable')
+        starts = self.starts[order]
+        candidates = np.zeros(len(self), dtype=bool)
+        escaped = json.dumps(substring)[1:-1]
+        upper_escaped = re.sub(r'\\u[0-9a-f]{4}', lambda m: '\\u' + m.group()[2:].upper(), escaped)
+        patterns = {substring, json.dumps(substring, ensure_ascii=False)[1:-1], escaped, upper_escaped}
+        for pattern in [p.encode('utf8') for p in patterns]:
+            pos = self.buffer.find(pattern)
+            while pos >= 0:
+                idx = int(np.searchsorted(starts, pos, side='right')) - 1
+                if idx < 0:
+                    pos = self.buffer.find(pattern, starts[0]) if len(starts) else -1
+                    continue
+                candidates[order[idx]] = True
+                pos = self.buffer.find(pattern, starts[idx + 1]) if idx + 1 < len(starts) else -1
+        for idx in np.flatnonzero(candidates):
+            mask[idx] = substring in self[idx]
+        return mask
+
+
+# raw manifest lines starting at given byte offsets of a memory-mapped manifest, exported as they were written
+class ManifestLines:
+    def __init__(self, buffer, starts):
+        self.buffer = buffer
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    # lines at given positions without line breaks
+    def take(self, indices):
+        lines = []
+        for start in self.starts[np.asarray(indices, dtype=np.int64)].tolist():
+            end = self.buffer.find(b'\n', start)
+            lines.append(self.buffer[start : end if end >= 0 else len(self.buffer)].strip())
+        return lines
+
+    # lines are written to prefix.jsonl one per line, their byte offsets to prefix.offsets.npy
+    def save(self, prefix):
+        offsets = np.zeros(len(self), dtype=np.int64)
+        position = 0
+        with open(prefix + '.jsonl', 'wb') as f:
+            for start in range(0, len(self), MANIFEST_CHUNK_LINES):
+                lines = self.take(np.arange(start, min(start + MANIFEST_CHUNK_LINES, len(self))))
+                lengths = np.array([len(line) + 1 for line in lines], dtype=np.int64)
+                offsets[start : start + len(lines)] = position + np.cumsum(lengths) - lengths
+                position += int(lengths.sum())
+                f.write(b''.join(line + b'\n' for line in lines))
+        np.save(prefix + '.offsets.npy', offsets)
+
+    @classmethod
+    def load(cls, prefix):
+        return cls(map_file(prefix + '.jsonl'), np.load(prefix + '.offsets.npy', mmap_mode='r'))
+
+
+# convert a manifest value to a string for StringColumn
+def column_string(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+# build a column from list of values, missing values are None
+def make_column(values):
+    present = [v for v in values if v is not None]
+    if present and len(present) == len(values) and all(isinstance(v, bool) for v in present):
+        return np.array(values, dtype=bool)
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        if len(present) == len(values) and all(isinstance(v, int) for v in present):
+            return np.array(values, dtype=np.int64)
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return StringColumn([column_string(v) for v in values])
+
+
+# rows of numeric column in ascending order of values, answers range queries with binary search
+class SortedIndex:
+    def __init__(self, column, order=None):
+        self.column = column
+        if order is None:
+            order = np.argsort(column, kind='stable')
+            order = order.astype(np.int32) if len(order) < 2 ** 31 else order
+        self.order = order
+        # missing values (NaN) are placed at the end and never match range queries
+        self.num_valid = len(column) - int(np.count_nonzero(column != column))
+        self.descending_order = None
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + (0 if self.descending_order is None else self.descending_order.nbytes)
+
+    # sorted sequence of values for bisect
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, pos):
+        return self.column[self.order[pos]]
+
+    # ranges of positions in sorted order matching the predicate
+    def ranges(self, op, value):
+        lo = bisect.bisect_left(self, value, 0, self.num_valid)
+        hi = bisect.bisect_right(self, value, lo, self.num_valid)
+        return {
+            'lt': [(0, lo)],
+            'le': [(0, hi)],
+            'gt': [(hi, self.num_valid)],
+            'ge': [(lo, self.num_valid)],
+            'eq': [(lo, hi)],
+            'ne': [(0, lo), (hi, len(self))],
+        }[op]
+
+    def count(self, op, value):
+        return sum(hi - lo for lo, hi in self.ranges(op, value))
+
+    # matching rows ordered by value
+    def rows(self, op, value):
+        return np.concatenate([self.order[lo:hi] for lo, hi in self.ranges(op, value)]).astype(np.int64)
+
+    # all rows in sorted order, equal values keep their order and missing values go last in both directions
+    def ordered(self, descending=False):
+        if not descending:
+            return self.order
+        if self.descending_order is None:
+            valid = self.order[: self.num_valid][::-1]
+            values = self.column[valid]
+            # reversing puts equal values in descending row order, reverse each run of equal values back
+            starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+            ends = np.r_[starts[1:], len(values)]
+            target = np.repeat(starts + ends - 1, ends - starts) - np.arange(len(values))
+            descending_order = np.empty_like(valid)
+            descending_order[target] = valid
+            self.descending_order = np.concatenate([descending_order, self.order[self.num_valid :]])
+        return self.descending_order
+
+
+# separators of tokens in text index, substrings without them are always inside a single token
+TOKEN_SEPARATORS = re.compile(r'[\s/\\._\-]+')
+
+
+# inverted index of tokens in string column with n-grams of distinct tokens, answers substring queries
+class TextIndex:
+    NGRAM_SIZE = 3
+
+    def __init__(self, column):
+        token_ids = {}
+        rows = []
+        ids = []
+        for idx, value in enumerate(column):
+            for token in set(TOKEN_SEPARATORS.split(value)):
+                if token:
+                    rows.append(idx)
+                    ids.append(token_ids.setdefault(token, len(token_ids)))
+        self.num_rows = len(column)
+        self.tokens = StringColumn(token_ids)
+        ids = np.array(ids, dtype=np.int64)
+        # rows of every token, stored one after another in order of token ids
+        self.postings = np.array(rows, dtype=np.int32)[np.argsort(ids, kind='stable')]
+        self.posting_offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=len(token_ids)), out=self.posting_offsets[1:])
+
+        ngrams = defaultdict(list)
+        for token_id, token in enumerate(token_ids):
+            for ngram in {token[i : i + self.NGRAM_SIZE] for i in range(len(token) - self.NGRAM_SIZE + 1)}:
+                ngrams[ngram].append(token_id)
+        self.ngrams = {ngram: np.array(token_ids, dtype=np.int32) for ngram, token_ids in ngrams.items()}
+
+    def save(self, prefix):
+        self.tokens.save(prefix + '.tokens')
+        np.save(prefix + '.postings.npy', self.postings)
+        np.save(prefix + '.posting_offsets.npy', self.posting_offsets)
+        ngrams = list(self.ngrams)
+        StringColumn(ngrams).save(prefix + '.ngrams')
+        ngram_offsets = np.zeros(len(ngrams) + 1, dtype=np.int64)
+        np.cumsum([len(self.ngrams[ngram]) for ngram in ngrams], out=ngram_offsets[1:])
+        np.save(prefix + '.ngram_offsets.npy', ngram_offsets)
+        ngram_tokens = [self.ngrams[ngram] for ngram in ngrams]
+        np.save(prefix + '.ngram_tokens.npy', np.concatenate(ngram_tokens + [np.zeros(0, dtype=np.int32)]))
+
+    # load index saved by save(), postings are memory-mapped
+    @classmethod
+    def load(cls, prefix, num_rows):
+        index = cls.__new__(cls)
+        index.num_rows = num_rows
+        index.tokens = StringColumn.load(prefix + '.tokens')
+        index.postings = np.load(prefix + '.postings.npy', mmap_mode='r')
+        index.posting_offsets = np.load(prefix + '.posting_offsets.npy', mmap_mode='r')
+        ngram_offsets = np.load(prefix + '.ngram_offsets.npy').tolist()
+        ngram_tokens = np.load(prefix + '.ngram_tokens.npy', mmap_mode='r')
+        index.ngrams = {
+            ngram: ngram_tokens[start:end]
+            for ngram, start, end in zip(StringColumn.load(prefix + '.ngrams'), ngram_offsets[:-1], ngram_offsets[1:])
+        }
+        return index
+
+    @property
+    def nbytes(self):
+        return (
+            self.tokens.nbytes
+            + self.postings.nbytes
+            + self.posting_offsets.nbytes
+            + sum(token_ids.nbytes for token_ids in self.ngrams.values())
+        )
+
+    # ids of tokens containing substring without separators
+    def matching_tokens(self, substring):
+        if len(substring) < self.NGRAM_SIZE:
+            return np.flatnonzero(self.tokens.contains(substring))
+        ngrams = {substring[i : i + self.NGRAM_SIZE] for i in range(len(substring) - self.NGRAM_SIZE + 1)}
+        candidates = None
+        for ngram in sorted(ngrams, key=lambda ngram: len(self.ngrams.get(ngram, ()))):
+            token_ids = self.ngrams.get(ngram)
+            if token_ids is None:
+                return np.zeros(0, dtype=np.int64)
+            candidates = token_ids if candidates is None else np.intersect1d(candidates, token_ids, assume_unique=True)
+        return np.array([token_id for token_id in candidates if substring in self.tokens[token_id]], dtype=np.int64)
+
+    # sorted rows containing any of the tokens
+    def token_rows(self, token_ids):
+        postings = [self.postings[self.posting_offsets[t] : self.posting_offsets[t + 1]] for t in token_ids]
+        if len(postings) == 1:
+            return postings[0].astype(np.int64)
+        mask = np.zeros(self.num_rows, dtype=bool)
+        for rows in postings:
+            mask[rows] = True
+        return np.flatnonzero(mask)
+
+    # sorted rows of column containing substring, None if the index can not answer the query
+    def search(self, column, substring):
+        pieces = [piece for piece in TOKEN_SEPARATORS.split(substring) if piece]
+        if not pieces:
+            return None
+        candidates = None
+        for piece in sorted(pieces, key=len, reverse=True):
+            rows = self.token_rows(self.matching_tokens(piece))
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                break
+        if pieces == [substring]:
+            return candidates
+        # substring spans several tokens, check candidates
+        if len(candidates) > len(column) // 64:
+            return np.flatnonzero(column.contains(substring))
+        return candidates[np.array([substring in column[idx] for idx in candidates], dtype=bool)]
+
+
+# column-oriented table: numeric fields are kept in NumPy arrays, strings in StringColumn
+class ColumnStore:
+    def __init__(self, columns=None):
+        self.columns = dict(columns or {})
+        # sorted indexes of numeric columns and inverted indexes of string columns
+        self.indexes = {}
+        self.text_indexes = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        keys = {}
+        for row in rows:
+            for k in row:
+                keys[k] = None
+        return cls({k: make_column([row.get(k) for row in rows]) for k in keys})
+
+    @classmethod
+    def concatenate(cls, stores):
+        # empty stores may miss columns of the other ones
+        stores = [store for store in stores if len(store)] or stores[:1]
+        keys = {}
+        for store in stores:
+            for k in store.columns:
+                keys[k] = None
+        columns = {}
+        for k in keys:
+            parts = [store.columns.get(k) for store in stores]
+            arrays = all(isinstance(part, np.ndarray) for part in parts)
+            if arrays and len({part.dtype.kind == 'b' for part in parts}) == 1:
+                columns[k] = np.concatenate(parts)
+            elif all(part is None or (isinstance(part, np.ndarray) and part.dtype.kind in 'iuf') for part in parts):
+                columns[k] = np.concatenate(
+                    [
+                        np.full(len(store), np.nan) if part is None else part.astype(np.float64)
+                        for store, part in zip(stores, parts)
+                    ]
+                )
+            else:
+                columns[k] = StringColumn.concatenate(
+                    [
+                        part
+                        if isinstance(part, StringColumn)
+                        else StringColumn([column_string(v) for v in store.column_values(k)])
+                        for store, part in zip(stores, parts)
+                    ]
+                )
+        return cls(columns)
+
+    # new store with rows at given positions, indexes are not copied
+    def take(self, indices):
+        return ColumnStore(
+            {
+                k: column.select(indices) if isinstance(column, StringColumn) else column[indices]
+                for k, column in self.columns.items()
+            }
+        )
+
+    # save columns and indexes into directory, each column is stored in its own file
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        meta = {'columns': [], 'indexes': [], 'text_indexes': []}
+        for i, (k, column) in enumerate(self.columns.items()):
+            prefix = os.path.join(path, str(i))
+            if isinstance(column, StringColumn):
+                column.save(prefix)
+                meta['columns'].append([k, 'string'])
+            else:
+                np.save(prefix + '.npy', column)
+                meta['columns'].append([k, 'array'])
+            if k in self.indexes:
+                np.save(prefix + '.index.npy', self.indexes[k].order)
+                meta['indexes'].append(k)
+            if k in self.text_indexes:
+                self.text_indexes[k].save(prefix + '.text_index')
+                meta['text_indexes'].append(k)
+        with open(os.path.join(path, 'columns.json'), 'w', encoding='utf8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    # load store saved by save(), columns and indexes are memory-mapped
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'columns.json'), 'r', encoding='utf8') as f:
+            meta = json.load(f)
+        store = cls()
+        for i, (k, kind) in enumerate(meta['columns']):
+            prefix = os.path.join(path, str(i))
+            if kind == 'string':
+                store.columns[k] = StringColumn.load(prefix)
+            else:
+                store.columns[k] = np.load(prefix + '.npy', mmap_mode='r')
+            if k in meta['indexes']:
+                store.indexes[k] = SortedIndex(store.columns[k], np.load(prefix + '.index.npy', mmap_mode='r'))
+            if k in meta['text_indexes']:
+                store.text_indexes[k] = TextIndex.load(prefix + '.text_index', len(store.columns[k]))
+        return store
+
+    @property
+    def nbytes(self):
+        indexes = list(self.indexes.values()) + list(self.text_indexes.values())
+        return sum(column.nbytes for column in self.columns.values()) + sum(index.nbytes for index in indexes)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __getitem__(self, key):
+        return self.columns[key]
+
+    def __setitem__(self, key, column):
+        self.columns[key] = column
+        self.indexes.pop(key, None)
+        self.text_indexes.pop(key, None)
+
+    # build sorted indexes for numeric columns which do not have one yet
+    def build_indexes(self):
+        for k in self.columns:
+            if self.is_numeric(k) and k not in self.indexes:
+                self.indexes[k] = SortedIndex(self.columns[k])
+
+    # build inverted indexes for given string columns which do not have one yet
+    def build_text_indexes(self, keys):
+        for k in keys:
+            if isinstance(self.columns.get(k), StringColumn) and k not in self.text_indexes:
+                self.text_indexes[k] = TextIndex(self.columns[k])
+
+    def keys(self):
+        return list(self.columns)
+
+    def is_numeric(self, key):
+        column = self.columns[key]
+        return isinstance(column, np.ndarray) and column.dtype.kind in 'iuf'
+
+    # values of column as Python objects, None for missing values
+    def column_values(self, key, indices=None):
+        column = self.columns.get(key)
+        if column is None:
+            return [None] * (len(self) if indices is None else len(indices))
+        if indices is None:
+            indices = range(len(self))
+        if isinstance(column, StringColumn):
+            return column.take(indices)
+        values = column[np.asarray(indices, dtype=np.int64)].tolist()
+        if column.dtype.kind == 'f':
+            values = [None if v != v else v for v in values]
+        return values
+
+    def rows(self, indices):
+        columns = [self.column_values(k, indices) for k in self.columns]
+        return [dict(zip(self.columns, values)) for values in zip(*columns)]
+
+    def row(self, idx):
+        return self.rows([idx])[0]
+
+
+# row data in table pages keeps index of row in the column store
+ROW_INDEX_KEY = '_index'
+
+
+# compile table filter query into list of (column, operator, value) clauses
+def compile_filter_query(filter_query):
+    clauses = []
+    for filter_part in filter_query.split(' && '):
+        col_name, op, filter_value = split_filter_part(filter_part)
+        if op is not None:
+            clauses.append((col_name, op, filter_value))
+    return clauses
+
+
+# evaluate filter clause over the column, or only over given rows, returns mask of matching rows
+def filter_mask(store, col_name, op, filter_value, indices=None):
+    column = store[col_name]
+    num_rows = len(store) if indices is None else len(indices)
+    if op == 'contains':
+        text_index = store.text_indexes.get(col_name)
+        if text_index is not None and indices is None:
+            rows = text_index.search(column, filter_value)
+            if rows is not None:
+                mask = np.zeros(num_rows, dtype=bool)
+                mask[rows] = True
+                return mask
+        if isinstance(column, StringColumn) and (indices is None or num_rows > len(store) // 8):
+            mask = column.contains(filter_value)
+            return mask if indices is None else mask[indices]
+        return np.array([filter_value in str(v) for v in store.column_values(col_name, indices)], dtype=bool)
+    if isinstance(column, StringColumn):
+        values = column if indices is None else column.take(indices)
+        mask = [getattr(operator, op)(value, filter_value) for value in values]
+    else:
+        mask = getattr(operator, op)(column if indices is None else column[indices], filter_value)
+    return np.broadcast_to(np.asarray(mask, dtype=bool), (num_rows,))
+
+
+# sort key of numeric column, missing values go last in both directions
+def sort_key(values, descending=False):
+    if values.dtype.kind == 'b':
+        values = values.astype(np.int64)
+    return -values if descending else values
+
+
+# filtered and sorted view of column store, memoizes the last query so that paging does not repeat it
+class TableQuery:
+    # sort everything at once when more than this fraction of rows is requested
+    FULL_SORT_FRACTION = 0.25
+    # walk the sorted index of a column instead of sorting when more than this fraction of rows matches
+    INDEX_ORDER_FRACTION = 0.05
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.query = None
+        self.indices = None
+        self.order = None
+
+    def _update(self, filter_query, sort_by):
+        query = (filter_query, tuple((s['column_id'], s['direction']) for s in sort_by[:1]))
+        if query == self.query:
+            return
+        self.indices = self._filter(compile_filter_query(filter_query))
+        # sorted prefix of matching rows, extended on demand
+        self.order = self.indices[:0] if query[1] else self.indices
+        self.query = query
+
+    # returns matching rows in store order
+    def _filter(self, clauses):
+        # predicates on indexed columns are answered by binary search or text index lookup,
+        # the most selective one gives candidates
+        best = None
+        for clause in clauses:
+            col_name, op, filter_value = clause
+            index = self.store.indexes.get(col_name)
+            text_index = self.store.text_indexes.get(col_name)
+            if index is not None and op != 'contains' and isinstance(filter_value, float):
+                count = index.count(op, filter_value)
+                if best is None or count < len(best[0]):
+                    best = (np.sort(index.rows(op, filter_value)), clause)
+            elif text_index is not None and op == 'contains':
+                rows = text_index.search(self.store[col_name], filter_value)
+                if rows is not None and (best is None or len(rows) < len(best[0])):
+                    best = (rows, clause)
+        if best is None:
+            mask = np.ones(len(self.store), dtype=bool)
+            for clause in clauses:
+                mask &= filter_mask(self.store, *clause)
+            return np.flatnonzero(mask)
+
+        indices, best_clause = best
+        for clause in clauses:
+            if clause is not best_clause and len(indices):
+                indices = indices[filter_mask(self.store, *clause, indices=indices)]
+        return indices
+
+    # sort the first k matching rows, equal values keep their order
+    def _sorted_prefix(self, k):
+        col, direction = self.query[1][0]
+        column = self.store[col]
+        indices = self.indices
+        descending = direction == 'desc'
+        index = self.store.indexes.get(col)
+        if index is not None and len(indices) >= len(self.store) * self.INDEX_ORDER_FRACTION:
+            order = index.ordered(descending)
+            if len(indices) == len(self.store):
+                return order
+            mask = np.zeros(len(self.store), dtype=bool)
+            mask[indices] = True
+            return order[mask[order]].astype(np.int64)
+        if isinstance(column, StringColumn):
+            return np.array(sorted(indices, key=column.__getitem__, reverse=descending), dtype=np.int64)
+        key = sort_key(column[indices], descending)
+        if k < len(indices) * self.FULL_SORT_FRACTION:
+            # top-k selection: everything below the k-th value plus the first of the equal ones
+            kth = np.partition(key, k - 1)[k - 1]
+            if kth == kth:
+                below = np.flatnonzero(key < kth)
+                ties = np.flatnonzero(key == kth)[: k - len(below)]
+                selected = np.concatenate([below, ties])
+                return indices[selected[np.argsort(key[selected], kind='stable')]]
+        return indices[np.argsort(key, kind='stable')]
+
+    # returns row indices of the requested page and number of matching rows
+    def page(self, filter_query, sort_by, page_current, page_size):
+        with self.lock:
+            self._update(filter_query, sort_by)
+            num_rows = len(self.indices)
+            if page_current * page_size >= num_rows:
+                page_current = num_rows // page_size
+            start = page_current * page_size
+            stop = min(start + page_size, num_rows)
+            if len(self.order) < stop:
+                self.order = self._sorted_prefix(max(stop, 2 * len(self.order)))
+            return self.order[start:stop], num_rows
+
+    # returns row indices of all matching rows in sorted order
+    def all(self, filter_query, sort_by):
+        with self.lock:
+            self._update(filter_query, sort_by)
+            if len(self.order) < len(self.indices):
+                self.order = self._sorted_prefix(len(self.indices))
+            return self.order
+
+
 # standard command-line arguments parser
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description='Speech Data Explorer')
     parser.add_argument(
-        'manifest', help='path to JSON manifest file',
+        'manifest', help='path to JSON manifest file or to binary dataset directory written by --convert',
     )
     parser.add_argument('--vocab', help='optional vocabulary to highlight OOV words')
     parser.add_argument('--port', default='8050', help='serving port for establishing connection')
     parser.add_argument(
         '--disable-caching-metrics', action='store_true', help='disable caching metrics for errors analysis'
     )
+    parser.add_argument(
+        '--compare',
+        nargs='+',
+        default=[],
+        metavar='MANIFEST',
+        help='manifests with predictions of other models for the same lines as the main manifest',
+    )
+    parser.add_argument(
+        '--pred-fields',
+        nargs='+',
+        default=[],
+        metavar='FIELD',
+        help='fields of the main manifest with predictions of other models',
+    )
     parser.add_argument(
         '--estimate-audio-metrics',
         '-a',
         action='store_true',
         help='estimate frequency bandwidth and signal level of audio recordings',
     )
+    parser.add_argument(
+        '--workers', '-w', type=int, default=1, help='number of worker processes for computing metrics of manifest'
+    )
+    parser.add_argument(
+        '--text-index',
+        action='store_true',
+        help='build inverted index of text, pred_text and audio_filepath for fast substring filters',
+    )
+    parser.add_argument(
+        '--audio-format',
+        choices=['wav', 'flac', 'opus'],
+        default='wav',
+        help='encoding of audio streamed to the player',
+    )
+    parser.add_argument(
+        '--audio-cache-size',
+        type=int,
+        default=256,
+        help='memory limit in MB for decoded audio and spectrograms shared by callbacks',
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='keep only numeric columns in memory and read strings from the manifest on demand, for large manifests',
+    )
+    parser.add_argument(
+        '--prepare',
+        action='store_true',
+        help='precompute spectrograms and waveform envelopes of all utterances for fast plotting and exit',
+    )
+    parser.add_argument(
+        '--convert',
+        metavar='DATASET',
+        help='write manifest with computed metrics into binary dataset directory which loads without parsing and exit',
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='FILE',
+        help='profile loading of data with cProfile and write statistics to FILE',
+    )
     parser.add_argument('--debug', '-d', action='store_true', help='enable debug mode')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.convert and os.path.isdir(args.manifest):
+        parser.error('--convert needs a JSON manifest')
+    if args.convert and (args.streaming or args.disable_caching_metrics):
+        parser.error(
+            '--convert stores cached metrics and strings of the manifest, '
+            'it can not be used with --streaming or --disable-caching-metrics'
+        )
     print(args)
     return args
 
 
-# estimate frequency bandwidth of signal
-def eval_bandwidth(signal, sr, threshold=-50):
-    time_stride = 0.01
-    hop_length = int(sr * time_stride)
-    n_fft = 512
-    spectrogram = np.mean(
-        np.abs(librosa.stft(y=signal, n_fft=n_fft, hop_length=hop_length, window='blackmanharris')) ** 2, axis=1
-    )
+# estimate frequency bandwidth from mean power spectrum
+def spectrum_bandwidth(spectrogram, sr, n_fft, threshold=-50):
     power_spectrum = librosa.power_to_db(S=spectrogram, ref=np.max, top_db=100)
     freqband = 0
     for idx in range(len(power_spectrum) - 1, -1, -1):
@@ -116,8 +881,947 @@ def eval_bandwidth(signal, sr, threshold=-50):
     return freqband
 
 
-# load data from JSON manifest file
-def load_data(data_filename, disable_caching=False, estimate_audio=False, vocab=None):
+# estimate frequency bandwidth, peak level and duration of audio file, the file is read in blocks
+# and the mean power spectrum of centered STFT frames with Blackman-Harris window is accumulated frame by frame
+def analyze_audio_file(filepath, threshold=-50, block_size=2 ** 16):
+    time_stride = 0.01
+    n_fft = 512
+    window = librosa.filters.get_window('blackmanharris', n_fft, fftbins=True).astype(np.float32)
+    power_sum = np.zeros(n_fft // 2 + 1, dtype=np.float64)
+    num_frames = 0
+    num_samples = 0
+    peak = 0.0
+
+    # accumulate power spectrum of all frames which fit into buffer, returns the rest of buffer
+    def consume(buffer):
+        nonlocal power_sum, num_frames
+        if len(buffer) < n_fft:
+            return buffer
+        count = (len(buffer) - n_fft) // hop_length + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[: count * hop_length : hop_length]
+        power_sum += np.sum(np.abs(np.fft.rfft(frames * window, axis=1)) ** 2, axis=0, dtype=np.float64)
+        num_frames += count
+        return buffer[count * hop_length :]
+
+    try:
+        f = sf.SoundFile(filepath)
+    except RuntimeError:
+        # formats not supported by libsndfile are decoded by librosa as a whole
+        f = None
+        signal, sr = librosa.load(path=filepath, sr=None)
+        blocks = [signal]
+    else:
+        sr = f.samplerate
+        # mix down to mono like librosa.load
+        blocks = (b.mean(axis=1, dtype=np.float32) for b in f.blocks(block_size, dtype='float32', always_2d=True))
+    try:
+        hop_length = int(sr * time_stride)
+        # signal is padded with zeros on both sides like in centered STFT
+        buffer = np.zeros(n_fft // 2, dtype=np.float32)
+        for block in blocks:
+            if len(block):
+                peak = max(peak, float(np.max(np.abs(block))))
+            num_samples += len(block)
+            buffer = consume(np.concatenate([buffer, block]))
+        consume(np.concatenate([buffer, np.zeros(n_fft // 2, dtype=np.float32)]))
+    finally:
+        if f is not None:
+            f.close()
+
+    freq_bandwidth = spectrum_bandwidth(power_sum / max(num_frames, 1), sr, n_fft, threshold)
+    return int(freq_bandwidth), float(20 * np.log10(peak)), num_samples / sr
+
+
+def _analyze_audio_file(filepath):
+    return filepath, analyze_audio_file(filepath)
+
+
+# context for worker processes, fork keeps module state (parsed arguments) available in them
+def worker_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+# apply func to tasks in worker processes, results are yielded in order of completion
+def imap_unordered_workers(func, tasks, workers=1):
+    if workers <= 1:
+        yield from map(func, tasks)
+    else:
+        with worker_context().Pool(workers) as pool:
+            yield from pool.imap_unordered(func, tasks, chunksize=4)
+
+
+# split manifest file into chunks of whole lines, returns list of [start, end) byte offsets
+def manifest_chunks(data_filename, num_chunks):
+    file_size = os.path.getsize(data_filename)
+    boundaries = [0]
+    with open(data_filename, 'rb') as f:
+        for i in range(1, num_chunks):
+            pos = max(file_size * i // num_chunks, boundaries[-1])
+            f.seek(pos)
+            # move to the beginning of the next line
+            if pos > 0:
+                f.readline()
+            boundaries.append(min(f.tell(), file_size))
+    boundaries.append(file_size)
+    return [(s, e) for s, e in zip(boundaries[:-1], boundaries[1:]) if e > s]
+
+
+# read non-empty manifest lines in [start, end) byte range
+def read_manifest_lines(data_filename, start, end):
+    with open(data_filename, 'rb') as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if pos >= end:
+                break
+            pos += len(line)
+            if line.strip():
+                yield line
+
+
+# aggregated statistics of manifest lines, partial results can be merged and statistics of removed lines subtracted
+class ManifestStats:
+    COUNTS = ['wer_dist', 'wer_count', 'cer_dist', 'cer_count', 'wmr_count', 'num_pred']
+
+    def __init__(self):
+        self.wer_dist = 0
+        self.wer_count = 0
+        self.cer_dist = 0
+        self.cer_count = 0
+        self.wmr_count = 0
+        self.num_pred = 0
+        self.vocabulary = Counter()
+        self.alphabet = Counter()
+        self.match_vocab = Counter()
+        # (reference, hypothesis) word pairs of substitutions, deleted and inserted words
+        self.substitutions = Counter()
+        self.deletions = Counter()
+        self.insertions = Counter()
+
+    def update(self, other, sign=1):
+        for k in self.COUNTS:
+            setattr(self, k, getattr(self, k) + sign * getattr(other, k))
+        for k in ['vocabulary', 'alphabet', 'match_vocab', 'substitutions', 'deletions', 'insertions']:
+            counter = getattr(self, k)
+            if sign > 0:
+                counter.update(getattr(other, k))
+            else:
+                counter.subtract(getattr(other, k))
+                # drop words which are not in the manifest anymore
+                setattr(self, k, +counter)
+
+
+# word-level Levenshtein alignment of reference and hypothesis over interned token ids, returns its edit script with
+# a character per aligned word: '=' for a match, 'S', 'D' and 'I' for a substitution, deletion and insertion,
+# reference words matched by hypothesis, substituted (reference, hypothesis) pairs, deleted and inserted words
+def align_words(orig, pred, token_ids):
+    ref = [token_ids.setdefault(word, len(token_ids)) for word in orig]
+    hyp = [token_ids.setdefault(word, len(token_ids)) for word in pred]
+    script = []
+    matched = []
+    substituted = []
+    deleted = []
+    inserted = []
+    ref_pos = 0
+    for tag, src_pos, dest_pos in Levenshtein.editops(ref, hyp):
+        # words between operations are matched
+        script.append('=' * (src_pos - ref_pos))
+        matched += orig[ref_pos:src_pos]
+        if tag == 'replace':
+            script.append('S')
+            substituted.append((orig[src_pos], pred[dest_pos]))
+            ref_pos = src_pos + 1
+        elif tag == 'delete':
+            script.append('D')
+            deleted.append(orig[src_pos])
+            ref_pos = src_pos + 1
+        else:
+            script.append('I')
+            inserted.append(pred[dest_pos])
+            ref_pos = src_pos
+    script.append('=' * (len(ref) - ref_pos))
+    matched += orig[ref_pos:]
+    return ''.join(script), matched, substituted, deleted, inserted
+
+
+# compute per-utterance metrics and partial statistics for manifest lines,
+# when streaming only numeric fields are kept and strings are left in the manifest
+def load_manifest_lines(data_filename, lines, streaming=False):
+    data = []
+    row_stats = []
+    stats = ManifestStats()
+    # first rows with all fields for the preview shown while loading, also when strings are streamed
+    preview = []
+
+    token_ids = {}
+    start = time.perf_counter()
+    align_seconds = 0.0
+    for line in lines:
+        item = json.loads(line)
+        if not isinstance(item['text'], str):
+            item['text'] = ''
+        num_chars = len(item['text'])
+        orig = item['text'].split()
+        num_words = len(orig)
+        stats.vocabulary.update(orig)
+        stats.alphabet.update(item['text'])
+
+        has_pred = 'pred_text' in item
+        word_dist = 0
+        char_dist = 0
+        hits = 0
+        script = ''
+        if has_pred:
+            align_start = time.perf_counter()
+            script, matched, substituted, deleted, inserted = align_words(orig, item['pred_text'].split(), token_ids)
+            insertions = len(inserted)
+            deletions = len(deleted)
+            word_dist = len(substituted) + deletions + insertions
+            char_dist = Levenshtein.distance(item['text'], item['pred_text'])
+            align_seconds += time.perf_counter() - align_start
+            hits = len(matched)
+            stats.wer_dist += word_dist
+            stats.cer_dist += char_dist
+            stats.wer_count += num_words
+            stats.cer_count += num_chars
+            stats.wmr_count += hits
+            stats.num_pred += 1
+            stats.match_vocab.update(matched)
+            stats.substitutions.update(substituted)
+            stats.deletions.update(deleted)
+            stats.insertions.update(inserted)
+
+        # sufficient statistics of the row, used to update global statistics when lines are removed,
+        # and the edit script of its alignment for showing the diff
+        row_stats.append(
+            {
+                'duration': item['duration'],
+                'word_dist': word_dist,
+                'char_dist': char_dist,
+                'hits': hits,
+                'has_pred': has_pred,
+                'alignment': script,
+            }
+        )
+        data.append(
+            {
+                'audio_filepath': item['audio_filepath'],
+                'duration': round(item['duration'], 2),
+                'num_words': num_words,
+                'num_chars': num_chars,
+                'word_rate': round(num_words / item['duration'], 2),
+                'char_rate': round(num_chars / item['duration'], 2),
+                'text': item['text'],
+            }
+        )
+        if has_pred:
+            data[-1]['pred_text'] = item['pred_text']
+            if num_words == 0:
+                num_words = 1e-9
+            if num_chars == 0:
+                num_chars = 1e-9
+            data[-1]['WER'] = round(word_dist / num_words * 100.0, 2)
+            data[-1]['CER'] = round(char_dist / num_chars * 100.0, 2)
+            data[-1]['WMR'] = round(hits / num_words * 100.0, 2)
+            data[-1]['I'] = insertions
+            data[-1]['D'] = deletions
+            data[-1]['D-I'] = deletions - insertions
+
+        for k in item:
+            if k not in data[-1]:
+                data[-1][k] = item[k]
+        if len(preview) < DATA_PAGE_SIZE:
+            preview.append({k: v if isinstance(v, (int, float)) else column_string(v) for k, v in data[-1].items()})
+        if streaming:
+            for k, v in data[-1].items():
+                if not isinstance(v, (int, float)):
+                    data[-1][k] = None
+
+    part = {
+        'data': ColumnStore.from_rows(data),
+        'row_stats': ColumnStore.from_rows(row_stats),
+        'stats': stats,
+        'preview': preview,
+    }
+    # time spent by this process, reading and parsing lines and building columns is accounted as parsing
+    part['timings'] = {'parse': time.perf_counter() - start - align_seconds, 'align': align_seconds}
+    return part
+
+
+# compute per-utterance metrics and partial statistics for manifest lines in [start, end) byte range
+def load_manifest_chunk(data_filename, start, end, streaming=False):
+    return load_manifest_lines(data_filename, read_manifest_lines(data_filename, start, end), streaming)
+
+
+# compute metrics of manifest lines starting at given byte offsets
+def load_manifest_offsets(data_filename, offsets, streaming=False):
+    def read_lines():
+        with open(data_filename, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield f.readline()
+
+    return load_manifest_lines(data_filename, read_lines(), streaming)
+
+
+def _load_manifest_chunk(task):
+    return load_manifest_chunk(*task)
+
+
+def _load_manifest_offsets(task):
+    return load_manifest_offsets(*task)
+
+
+# manifest is processed in chunks of at most this size even by a single process, so that loading progress and
+# statistics of parsed lines are published as chunks finish and lines not converted to columns yet take little memory
+MANIFEST_CHUNK_BYTES = 2 ** 22
+MANIFEST_CHUNK_LINES = 2 ** 14
+
+
+# progress of loading data, published by the loading thread and shown by the pages until data is ready
+class LoadingProgress:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage = 'Starting'
+        self.stage_start = time.monotonic()
+        self.done = 0
+        self.total = 0
+        self.lines = 0
+        self.lines_per_sec = 0.0
+        self.hours = 0.0
+        self.counts = dict.fromkeys(ManifestStats.COUNTS, 0)
+        # first page of rows of parsed chunks, shown read-only until the samples table is available
+        self.preview = []
+        self.ready = False
+        self.error = None
+
+    # start a loading stage with given amount of work, 0 if it is not known
+    def start(self, stage, total=0):
+        with self.lock:
+            self.stage = stage
+            self.stage_start = time.monotonic()
+            self.done = 0
+            self.total = total
+
+    def advance(self, done):
+        with self.lock:
+            self.done += done
+
+    # account a parsed manifest chunk, which is done amount of work
+    def add_chunk(self, part, done):
+        with self.lock:
+            self.done += done
+            self.lines += len(part['data'])
+            self.lines_per_sec = self.lines / max(time.monotonic() - self.stage_start, 1e-9)
+            self.hours += float(part['row_stats']['duration'].sum()) / 3600.0
+            for k in self.counts:
+                self.counts[k] += getattr(part['stats'], k)
+            self.preview += part['preview'][: DATA_PAGE_SIZE - len(self.preview)]
+
+    def finish(self, error=None):
+        with self.lock:
+            self.ready = error is None
+            self.error = error
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.stage_start
+            fraction = min(self.done / self.total, 1.0) if self.total > 0 else None
+            return {
+                'stage': self.stage,
+                'fraction': fraction,
+                'lines': self.lines,
+                'lines_per_sec': self.lines_per_sec,
+                'eta': elapsed * (1 - fraction) / fraction if fraction else None,
+                'hours': self.hours,
+                'counts': dict(self.counts),
+                'preview': list(self.preview),
+                'ready': self.ready,
+                'error': self.error,
+            }
+
+
+loading_progress = LoadingProgress()
+
+
+# durations of loading stages and latency and response size histograms of callbacks, exported in Prometheus text
+# format on /metrics
+class PerfMetrics:
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    SIZE_BUCKETS = tuple(2 ** i for i in range(8, 26, 2))
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # wall-clock seconds of stages of the loading thread, stages which run several times are summed
+        self.stages = OrderedDict()
+        # seconds spent by loading processes on steps of manifest lines, summed over worker processes
+        self.work = defaultdict(float)
+        # (metric, callback) -> [counts per bucket, sum, count]
+        self.histograms = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_work(self, timings):
+        with self.lock:
+            for step, seconds in timings.items():
+                self.work[step] += seconds
+
+    def observe(self, metric, callback, value):
+        buckets = self.SIZE_BUCKETS if metric.endswith('_bytes') else self.LATENCY_BUCKETS
+        with self.lock:
+            histogram = self.histograms.setdefault((metric, callback), [[0] * len(buckets), 0.0, 0])
+            # values above the largest bucket are counted by +Inf bucket only
+            pos = bisect.bisect_left(buckets, value)
+            if pos < len(buckets):
+                histogram[0][pos] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self, gauges):
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} {}'.format(name, kind))
+
+        with self.lock:
+            header('sde_load_stage_seconds', 'gauge', 'Wall-clock duration of data loading stages.')
+            for stage, seconds in self.stages.items():
+                lines.append('sde_load_stage_seconds{{stage="{}"}} {}'.format(stage, seconds))
+            header(
+                'sde_load_work_seconds_total', 'counter', 'Time spent on manifest lines, summed over worker processes.'
+            )
+            for step, seconds in self.work.items():
+                lines.append('sde_load_work_seconds_total{{step="{}"}} {}'.format(step, seconds))
+            for metric, help_text in PERF_HISTOGRAMS.items():
+                header(metric, 'histogram', help_text)
+                buckets = self.SIZE_BUCKETS if metric.endswith('_bytes') else self.LATENCY_BUCKETS
+                for (name, callback), (counts, total, count) in self.histograms.items():
+                    if name != metric:
+                        continue
+                    cumulative = 0
+                    for le, bucket_count in zip(buckets, counts):
+                        cumulative += bucket_count
+                        lines.append('{}_bucket{{callback="{}",le="{}"}} {}'.format(metric, callback, le, cumulative))
+                    lines.append('{}_bucket{{callback="{}",le="+Inf"}} {}'.format(metric, callback, count))
+                    lines.append('{}_sum{{callback="{}"}} {}'.format(metric, callback, total))
+                    lines.append('{}_count{{callback="{}"}} {}'.format(metric, callback, count))
+        for name, (kind, help_text, value) in gauges.items():
+            if value is not None:
+                header(name, kind, help_text)
+                lines.append('{} {}'.format(name, value))
+        return '\n'.join(lines) + '\n'
+
+
+PERF_HISTOGRAMS = {
+    'sde_callback_seconds': 'Time spent in callbacks.',
+    'sde_request_seconds': 'Time of requests of callbacks, including serialization of the response.',
+    'sde_response_bytes': 'Size of responses of callbacks.',
+}
+
+perf_metrics = PerfMetrics()
+
+
+# record latency of a callback or route, and latency and size of its response when it is called by a request
+def instrumented(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if flask.has_request_context():
+            flask.g.sde_callback = func.__name__
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            perf_metrics.observe('sde_callback_seconds', func.__name__, time.perf_counter() - start)
+
+    return wrapper
+
+
+# load manifest chunks in parallel, yields partial results in manifest order
+# if offsets of lines are given, only they are processed instead of the whole manifest
+def load_manifest_chunks(data_filename, workers=1, offsets=None, streaming=False):
+    # several chunks per worker to balance the load
+    num_chunks = workers * 4 if workers > 1 else 1
+    if offsets is None:
+        num_chunks = max(num_chunks, math.ceil(os.path.getsize(data_filename) / MANIFEST_CHUNK_BYTES))
+        chunks = manifest_chunks(data_filename, num_chunks)
+        tasks = [(data_filename, start, end, streaming) for start, end in chunks]
+        # progress in bytes
+        sizes = [end - start for start, end in chunks]
+        func = _load_manifest_chunk
+    else:
+        num_chunks = max(num_chunks, math.ceil(len(offsets) / MANIFEST_CHUNK_LINES))
+        chunk_size = max(1, math.ceil(len(offsets) / num_chunks))
+        tasks = [(data_filename, offsets[i : i + chunk_size], streaming) for i in range(0, len(offsets), chunk_size)]
+        # progress in lines
+        sizes = [len(task[1]) for task in tasks]
+        func = _load_manifest_offsets
+
+    loading_progress.start('Parsing manifest', sum(sizes))
+    with perf_metrics.stage('parse_manifest'):
+        if not tasks:
+            yield load_manifest_lines(data_filename, [], streaming)
+        elif workers <= 1:
+            for part, size in zip(tqdm.tqdm(map(func, tasks), total=len(tasks), unit='chunk'), sizes):
+                loading_progress.add_chunk(part, size)
+                perf_metrics.add_work(part['timings'])
+                yield part
+        else:
+            with worker_context().Pool(workers) as pool:
+                for part, size in zip(tqdm.tqdm(pool.imap(func, tasks), total=len(tasks), unit='chunk'), sizes):
+                    loading_progress.add_chunk(part, size)
+                    perf_metrics.add_work(part['timings'])
+                    yield part
+
+
+# merge partial results of manifest chunks in manifest order
+def merge_manifest_chunks(parts):
+    data = []
+    row_stats = []
+    stats = ManifestStats()
+    for part in parts:
+        data.append(part['data'])
+        row_stats.append(part['row_stats'])
+        stats.update(part['stats'])
+    return ColumnStore.concatenate(data), ColumnStore.concatenate(row_stats), stats
+
+
+# statistics of rows which are already loaded, used to subtract lines removed from manifest
+def rows_stats(data, row_stats, indices):
+    stats = ManifestStats()
+    token_ids = {}
+    has_pred = row_stats['has_pred'][indices]
+    for text, pred_text, pred_available in zip(
+        data['text'].take(indices), data.column_values('pred_text', indices), has_pred.tolist()
+    ):
+        orig = text.split()
+        stats.vocabulary.update(orig)
+        stats.alphabet.update(text)
+        if pred_available:
+            _, matched, substituted, deleted, inserted = align_words(orig, pred_text.split(), token_ids)
+            stats.match_vocab.update(matched)
+            stats.substitutions.update(substituted)
+            stats.deletions.update(deleted)
+            stats.insertions.update(inserted)
+    pred_indices = indices[has_pred]
+    stats.wer_dist = int(row_stats['word_dist'][pred_indices].sum())
+    stats.cer_dist = int(row_stats['char_dist'][pred_indices].sum())
+    stats.wmr_count = int(row_stats['hits'][pred_indices].sum())
+    stats.wer_count = int(data['num_words'][pred_indices].sum())
+    stats.cer_count = int(data['num_chars'][pred_indices].sum())
+    stats.num_pred = len(pred_indices)
+    return stats
+
+
+# aggregated metrics of rows computed from per-row statistics, vectorized counterpart of rows_stats
+# for metrics which do not need word alignments, error rates are missing if no row has a prediction
+def rows_metrics(data, row_stats, indices):
+    has_pred = np.asarray(row_stats['has_pred'])[indices]
+    pred_indices = indices[has_pred]
+    metrics = {'hours': float(row_stats['duration'][indices].sum()) / 3600.0}
+    num_words = int(data['num_words'][pred_indices].sum())
+    num_chars = int(data['num_chars'][pred_indices].sum())
+    if num_words > 0:
+        metrics['wer'] = int(row_stats['word_dist'][pred_indices].sum()) / num_words * 100.0
+        metrics['wmr'] = int(row_stats['hits'][pred_indices].sum()) / num_words * 100.0
+    if num_chars > 0:
+        metrics['cer'] = int(row_stats['char_dist'][pred_indices].sum()) / num_chars * 100.0
+    return metrics
+
+
+# word errors of all rows: substituted (reference, prediction) pairs, deleted and inserted words with their counts
+def make_errors_table(stats):
+    rows = [('substitution', word, pred, count) for (word, pred), count in stats.substitutions.items()]
+    rows += [('deletion', word, '', count) for word, count in stats.deletions.items()]
+    rows += [('insertion', '', pred, count) for pred, count in stats.insertions.items()]
+    errors, words, preds, counts = zip(*rows) if rows else ([], [], [], [])
+    return ColumnStore(
+        {
+            'error': StringColumn(errors),
+            'word': StringColumn(words),
+            'pred': StringColumn(preds),
+            'count': np.array(counts, dtype=np.int64),
+        }
+    )
+
+
+# version of the metrics cache layout, caches of other versions are recomputed
+CACHE_VERSION = 4
+
+
+# content hash of manifest line, used as key of cached metrics
+def hash_line(line):
+    return hashlib.blake2b(line.strip(), digest_size=16).digest()
+
+
+# metrics cache is a directory with memory-mapped columns of data and per-row statistics,
+# content hashes of the manifest lines they were computed from and aggregated statistics
+def metrics_cache_dir(data_filename):
+    return data_filename.split('.json')[0] + '_sde_cache'
+
+
+def save_metrics_cache(cache_dir, hashes, data, row_stats, stats, errors, audio_metrics, histograms):
+    tmp_dir = cache_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    data.save(os.path.join(tmp_dir, 'data'))
+    # audio metrics are cached per file and kept even if they are not requested in this run
+    paths = list(audio_metrics)
+    values = list(zip(*audio_metrics.values())) or [[]] * 4
+    audio = ColumnStore(
+        {
+            'path': StringColumn(paths),
+            'size': np.array(values[0], dtype=np.int64),
+            'mtime_ns': np.array(values[1], dtype=np.int64),
+            'freq_bandwidth': np.array(values[2], dtype=np.int64),
+            'level_db': np.array(values[3], dtype=np.float64),
+        }
+    )
+    audio.save(os.path.join(tmp_dir, 'audio'))
+    row_stats.save(os.path.join(tmp_dir, 'row_stats'))
+    words = list(stats.vocabulary)
+    vocabulary = ColumnStore(
+        {
+            'word': StringColumn(words),
+            'count': np.array([stats.vocabulary[word] for word in words], dtype=np.int64),
+            'match': np.array([stats.match_vocab[word] for word in words], dtype=np.int64),
+        }
+    )
+    vocabulary.save(os.path.join(tmp_dir, 'vocabulary'))
+    errors.save(os.path.join(tmp_dir, 'errors'))
+    with open(os.path.join(tmp_dir, 'lines.bin'), 'wb') as f:
+        f.write(hashes)
+    meta = {
+        'version': CACHE_VERSION,
+        'stats': {k: getattr(stats, k) for k in ManifestStats.COUNTS},
+        'alphabet': dict(stats.alphabet),
+        'histograms': {k: [edges.tolist(), counts.tolist()] for k, (edges, counts) in histograms.items()},
+        # strings of streamed manifest are not cached
+        'streaming': any(isinstance(column, ManifestColumn) for column in data.columns.values()),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    replace_dir(tmp_dir, cache_dir)
+
+
+# replace directory by a new one, files of the previous one may still be mapped by this process
+def replace_dir(new_dir, target_dir):
+    old_dir = target_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target_dir):
+        os.replace(target_dir, old_dir)
+    os.replace(new_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+# exclusive lock of the metrics cache held while data is loaded, so that processes started together, e.g. workers of
+# a WSGI server, do not compute metrics concurrently: the first one writes the cache and the others load it,
+# nothing is locked if the cache is not used or the lock file can not be created, e.g. in a read-only directory,
+# the lock file is removed when the lock is released
+@contextmanager
+def metrics_cache_lock(data_filename, disable_caching=False):
+    if fcntl is None or disable_caching or os.path.isdir(data_filename):
+        yield
+        return
+    lock_filename = metrics_cache_dir(data_filename) + '.lock'
+    while True:
+        try:
+            f = open(lock_filename, 'a')
+        except OSError:
+            yield
+            return
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            loading_progress.start('Waiting for another process loading the manifest')
+            fcntl.flock(f, fcntl.LOCK_EX)
+        # the process which held the lock could have removed the file, then the lock is taken on a new one
+        try:
+            locked = os.path.samestat(os.fstat(f.fileno()), os.stat(lock_filename))
+        except OSError:
+            locked = False
+        if locked:
+            break
+        f.close()
+    with f:
+        try:
+            yield
+        finally:
+            # removed while it is locked, so that processes waiting for it lock the next file
+            try:
+                os.remove(lock_filename)
+            except OSError:
+                pass
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# load metrics cache, returns None if it does not exist, has another version or is incomplete
+def load_metrics_cache(cache_dir, streaming=False):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('streaming') != streaming:
+        return None
+    # a table missing in a cache of the same version, e.g. written before the table was added, invalidates the cache
+    try:
+        return read_metrics_cache(cache_dir, meta)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def read_metrics_cache(cache_dir, meta):
+    stats = ManifestStats()
+    for k, v in meta['stats'].items():
+        setattr(stats, k, v)
+    stats.alphabet = Counter(meta['alphabet'])
+    vocabulary = ColumnStore.load(os.path.join(cache_dir, 'vocabulary'))
+    words = list(vocabulary['word'])
+    stats.vocabulary = Counter(dict(zip(words, vocabulary['count'].tolist())))
+    stats.match_vocab = +Counter(dict(zip(words, vocabulary['match'].tolist())))
+    with open(os.path.join(cache_dir, 'lines.bin'), 'rb') as f:
+        hashes = f.read()
+    audio = ColumnStore.load(os.path.join(cache_dir, 'audio'))
+    audio_metrics = {
+        path: values
+        for path, *values in zip(
+            audio['path'],
+            audio['size'].tolist(),
+            audio['mtime_ns'].tolist(),
+            audio['freq_bandwidth'].tolist(),
+            audio['level_db'].tolist(),
+        )
+    }
+    return {
+        'hashes': hashes,
+        'data': ColumnStore.load(os.path.join(cache_dir, 'data')),
+        'row_stats': ColumnStore.load(os.path.join(cache_dir, 'row_stats')),
+        'stats': stats,
+        # counts of word errors are added to stats only when lines are added or removed, see load_error_counts()
+        'errors': ColumnStore.load(os.path.join(cache_dir, 'errors')),
+        'audio_metrics': audio_metrics,
+        'histograms': {k: (np.array(edges), np.array(counts)) for k, (edges, counts) in meta['histograms'].items()},
+    }
+
+
+# set counts of word errors of stats from word errors table written by make_errors_table()
+def load_error_counts(stats, errors):
+    for error, word, pred, count in zip(errors['error'], errors['word'], errors['pred'], errors['count'].tolist()):
+        if error == 'substitution':
+            stats.substitutions[(word, pred)] = count
+        elif error == 'deletion':
+            stats.deletions[word] = count
+        else:
+            stats.insertions[pred] = count
+
+
+# binary dataset is a metrics cache written by --convert, which is loaded instead of the manifest, together with the
+# manifest lines for export
+def load_dataset_dir(dataset_dir):
+    cache = load_metrics_cache(dataset_dir)
+    lines_prefix = os.path.join(dataset_dir, 'manifest')
+    if cache is None or not os.path.exists(lines_prefix + '.offsets.npy'):
+        raise ValueError('{} is not a dataset of version {}'.format(dataset_dir, CACHE_VERSION))
+    cache['lines'] = ManifestLines.load(lines_prefix)
+    return cache
+
+
+def convert_dataset(data_filename, dataset_dir):
+    tmp_dir = os.path.normpath(dataset_dir) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(metrics_cache_dir(data_filename), tmp_dir)
+    lines = ManifestLines(map_file(data_filename), manifest_line_offsets(data_filename))
+    lines.save(os.path.join(tmp_dir, 'manifest'))
+    replace_dir(tmp_dir, dataset_dir)
+
+
+# positions of cached lines for lines of manifest given by their hashes, -1 for lines which are not cached,
+# repeated lines are matched to repeated cached lines in order
+def match_cached_lines(cached_hashes, hashes):
+    cached = np.frombuffer(cached_hashes, dtype='V16')
+    current = np.frombuffer(hashes, dtype='V16')
+    source = np.full(len(current), -1, dtype=np.int64)
+    if not len(cached) or not len(current):
+        return source
+    cached_order = np.argsort(cached, kind='stable')
+    cached_sorted = cached[cached_order]
+    order = np.argsort(current, kind='stable')
+    current_sorted = current[order]
+    # number of previous occurrences of the same line
+    group_starts = np.r_[0, np.flatnonzero(current_sorted[1:] != current_sorted[:-1]) + 1]
+    rank = np.arange(len(current)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(current)]))
+    first = np.searchsorted(cached_sorted, current_sorted, side='left')
+    count = np.searchsorted(cached_sorted, current_sorted, side='right') - first
+    found = rank < count
+    source[order[found]] = cached_order[first[found] + rank[found]]
+    return source
+
+
+# load manifest reusing metrics of lines which did not change since the cache was written, returns data,
+# per-row statistics, aggregated statistics, hashes and byte offsets of manifest lines and whether the cache has to
+# be updated
+def load_manifest_cached(data_filename, cache, workers=1, streaming=False):
+    # hash manifest lines and remember their byte offsets
+    hashes = bytearray()
+    offsets = array('q')
+    loading_progress.start('Hashing manifest lines', os.path.getsize(data_filename))
+    with perf_metrics.stage('hash_lines'), open(data_filename, 'rb') as f:
+        offset = 0
+        reported = 0
+        for line in tqdm.tqdm(f, unit=' lines'):
+            if line.strip():
+                hashes += hash_line(line)
+                offsets.append(offset)
+            offset += len(line)
+            if offset - reported >= MANIFEST_CHUNK_BYTES:
+                loading_progress.advance(offset - reported)
+                reported = offset
+    hashes = bytes(hashes)
+    offsets = np.array(offsets, dtype=np.int64)
+
+    num_cached = 0 if cache is None else len(cache['hashes']) // 16
+    source = match_cached_lines(cache['hashes'] if cache is not None else b'', hashes)
+    used = np.zeros(num_cached, dtype=bool)
+    used[source[source >= 0]] = True
+    if streaming and not used.all():
+        # texts of removed lines are not kept when streaming, so their statistics can not be subtracted
+        print('Lines were removed from manifest, computing metrics of all lines...')
+        cache = None
+        num_cached = 0
+        source[:] = -1
+
+    if cache is not None and np.array_equal(source, np.arange(num_cached)):
+        return cache['data'], cache['row_stats'], cache['stats'], hashes, offsets, False
+
+    new = np.flatnonzero(source < 0)
+    source[new] = num_cached + np.arange(len(new))
+    print('Computing metrics of {} new or changed lines...'.format(len(new)))
+    new_data, new_row_stats, stats = merge_manifest_chunks(
+        load_manifest_chunks(data_filename, workers=workers, offsets=offsets[new], streaming=streaming)
+    )
+    if cache is None:
+        data, row_stats = new_data, new_row_stats
+    else:
+        # update aggregated statistics: subtract removed lines, add new ones
+        removed = np.flatnonzero(~used)
+        cached_stats = cache['stats']
+        load_error_counts(cached_stats, cache['errors'])
+        if len(removed):
+            cached_stats.update(rows_stats(cache['data'], cache['row_stats'], removed), sign=-1)
+        cached_stats.update(stats)
+        stats = cached_stats
+        data = ColumnStore.concatenate([cache['data'], new_data]).take(source)
+        row_stats = ColumnStore.concatenate([cache['row_stats'], new_row_stats]).take(source)
+    return data, row_stats, stats, hashes, offsets, True
+
+
+# byte offsets of non-empty manifest lines
+def manifest_line_offsets(data_filename):
+    offsets = array('q')
+    with open(data_filename, 'rb') as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                offsets.append(offset)
+            offset += len(line)
+    return np.array(offsets, dtype=np.int64)
+
+
+# replace string columns by columns which read values from the memory-mapped manifest, indexes are kept
+def bind_manifest_columns(data, data_filename, line_offsets):
+    buffer = map_file(data_filename)
+    for k, column in data.columns.items():
+        if isinstance(column, StringColumn):
+            data.columns[k] = ManifestColumn(k, buffer, line_offsets)
+
+
+# peak resident memory of this process in MB, None if it is not available
+def peak_memory():
+    if resource is None:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+# call func under cProfile if profile_filename is given, profile statistics are written to the file and functions
+# with the largest cumulative time are printed, work done by worker processes is not profiled
+def run_profiled(func, profile_filename=None):
+    if profile_filename is None:
+        return func()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(profile_filename)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+        print('Profile statistics are written to {}'.format(profile_filename))
+
+
+# compute frequency bandwidth and peak level of every audio file in data,
+# audio_metrics maps file path to [size, mtime_ns, freq_bandwidth, level_db] and is updated with analyzed files,
+# only files which are new or modified since they were analyzed are read, returns whether data has changed
+def estimate_audio_metrics(data, data_filename, audio_metrics, workers=1):
+    filepaths = {}
+    for audio_filepath in data['audio_filepath']:
+        if audio_filepath not in filepaths:
+            filepaths[audio_filepath] = os.path.abspath(absolute_audio_filepath(audio_filepath, data_filename))
+
+    file_stats = {}
+    for filepath in set(filepaths.values()):
+        st = os.stat(filepath)
+        cached = audio_metrics.get(filepath)
+        if cached is None or cached[:2] != [st.st_size, st.st_mtime_ns]:
+            file_stats[filepath] = st
+
+    changed = len(file_stats) > 0
+    if file_stats:
+        print('Analyzing {} audio files...'.format(len(file_stats)))
+        loading_progress.start('Analyzing audio files', len(file_stats))
+        audio_hours = 0.0
+        results = imap_unordered_workers(_analyze_audio_file, list(file_stats), workers)
+        progress = tqdm.tqdm(results, total=len(file_stats), unit=' files')
+        with perf_metrics.stage('audio_analysis'), progress:
+            for filepath, (freq_bandwidth, level_db, duration) in progress:
+                st = file_stats[filepath]
+                audio_metrics[filepath] = [st.st_size, st.st_mtime_ns, freq_bandwidth, level_db]
+                audio_hours += duration / 3600.0
+                loading_progress.advance(1)
+                elapsed = progress.format_dict['elapsed']
+                if elapsed > 0:
+                    progress.set_postfix_str('{:.3f} audio hours/s'.format(audio_hours / elapsed), refresh=False)
+
+    file_metrics = [audio_metrics[filepaths[audio_filepath]] for audio_filepath in data['audio_filepath']]
+    freq_bandwidth = np.array([metrics[2] for metrics in file_metrics], dtype=np.int64)
+    level_db = np.array([metrics[3] for metrics in file_metrics], dtype=np.float64)
+    for k, column in [('freq_bandwidth', freq_bandwidth), ('level_db', level_db)]:
+        if k not in data or not np.array_equal(data[k], column):
+            data[k] = column
+            changed = True
+    return changed
+
+
+# load data from JSON manifest file, hashes of its lines are returned if metrics are cached
+def load_data(
+    data_filename,
+    disable_caching=False,
+    estimate_audio=False,
+    vocab=None,
+    workers=1,
+    text_index=False,
+    streaming=False,
+):
 
     if vocab is not None:
         # load external vocab
@@ -132,155 +1836,368 @@ def load_data(data_filename, disable_caching=False, estimate_audio=False, vocab=
                     word = line.strip()
                 vocabulary_ext[word] = 1
 
-    if not disable_caching:
-        pickle_filename = data_filename.split('.json')[0]
-        json_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(data_filename))
-        timestamp = json_mtime.strftime('%Y%m%d_%H%M')
-        pickle_filename += '_' + timestamp + '.pkl'
-        if os.path.exists(pickle_filename):
-            with open(pickle_filename, 'rb') as f:
-                data, wer, cer, wmr, mwa, num_hours, vocabulary_data, alphabet, metrics_available = pickle.load(f)
-            if vocab is not None:
-                for item in vocabulary_data:
-                    item['OOV'] = item['word'] not in vocabulary_ext
-            if estimate_audio:
-                for item in data:
-                    filepath = absolute_audio_filepath(item['audio_filepath'], data_filename)
-                    signal, sr = librosa.load(path=filepath, sr=None)
-                    bw = eval_bandwidth(signal, sr)
-                    item['freq_bandwidth'] = int(bw)
-                    item['level_db'] = 20 * np.log10(np.max(np.abs(signal)))
-            with open(pickle_filename, 'wb') as f:
-                pickle.dump(
-                    [data, wer, cer, wmr, mwa, num_hours, vocabulary_data, alphabet, metrics_available],
-                    f,
-                    pickle.HIGHEST_PROTOCOL,
-                )
-            return data, wer, cer, wmr, mwa, num_hours, vocabulary_data, alphabet, metrics_available
+    errors_data = None
+    if os.path.isdir(data_filename):
+        # binary dataset, strings are memory-mapped from it as well, so they are not streamed from a manifest,
+        # the dataset is not modified, indexes or audio metrics which it does not have are kept in memory
+        cache_dir = None
+        with perf_metrics.stage('cache_read'):
+            cache = load_dataset_dir(data_filename)
+        data, row_stats, stats, errors_data = cache['data'], cache['row_stats'], cache['stats'], cache['errors']
+        hashes = cache['hashes']
+        lines = cache['lines']
+        changed = False
+        if estimate_audio:
+            changed = estimate_audio_metrics(data, data_filename, cache['audio_metrics'], workers)
+    elif disable_caching:
+        cache_dir = None
+        cache = None
+        hashes = None
+        line_offsets = manifest_line_offsets(data_filename)
+        chunks = load_manifest_chunks(data_filename, workers, streaming=streaming)
+        data, row_stats, stats = merge_manifest_chunks(chunks)
+        changed = False
+        if streaming:
+            bind_manifest_columns(data, data_filename, line_offsets)
+        if estimate_audio:
+            estimate_audio_metrics(data, data_filename, {}, workers)
+    else:
+        cache_dir = metrics_cache_dir(data_filename)
+        with perf_metrics.stage('cache_read'):
+            cache = load_metrics_cache(cache_dir, streaming)
+        audio_metrics = {} if cache is None else cache['audio_metrics']
+        data, row_stats, stats, hashes, line_offsets, changed = load_manifest_cached(
+            data_filename, cache, workers, streaming
+        )
+        if not changed:
+            # stats of unchanged lines have no counts of word errors, their table is kept
+            errors_data = cache['errors']
+        if streaming:
+            bind_manifest_columns(data, data_filename, line_offsets)
+        if estimate_audio:
+            changed = estimate_audio_metrics(data, data_filename, audio_metrics, workers) or changed
+    if not os.path.isdir(data_filename):
+        # lines of the manifest are exported as they are written, so JSON lines of samples are a sub-manifest
+        lines = ManifestLines(map_file(data_filename), line_offsets)
+
+    # sorted indexes for range filters and ordering are stored in the cache together with metrics
+    loading_progress.start('Building indexes')
+    for k in data.keys():
+        changed = changed or (data.is_numeric(k) and k not in data.indexes)
+    with perf_metrics.stage('indexes'):
+        data.build_indexes()
+        if text_index:
+            changed = changed or any(k in data and k not in data.text_indexes for k in TEXT_INDEX_COLUMNS)
+            data.build_text_indexes(TEXT_INDEX_COLUMNS)
+
+    if cache is not None and not changed:
+        histograms = cache['histograms']
+    else:
+        with perf_metrics.stage('histograms'):
+            histograms = {k: compute_histogram(data[k]) for k in data.keys() if data.is_numeric(k)}
+
+    if errors_data is None:
+        errors_data = make_errors_table(stats)
+        errors_data.build_indexes()
+
+    if cache_dir is not None and changed:
+        loading_progress.start('Saving metrics cache')
+        with perf_metrics.stage('cache_write'):
+            save_metrics_cache(cache_dir, hashes, data, row_stats, stats, errors_data, audio_metrics, histograms)
+        # continue with memory-mapped columns of the cache instead of the ones in memory
+        with perf_metrics.stage('cache_read'):
+            cache = load_metrics_cache(cache_dir, streaming)
+        data, row_stats, errors_data = cache['data'], cache['row_stats'], cache['errors']
+        if streaming:
+            bind_manifest_columns(data, data_filename, line_offsets)
 
-    data = []
-    wer_dist = 0.0
-    wer_count = 0
-    cer_dist = 0.0
-    cer_count = 0
-    wmr_count = 0
     wer = 0
     cer = 0
     wmr = 0
     mwa = 0
-    num_hours = 0
-    vocabulary = defaultdict(lambda: 0)
-    alphabet = set()
-    match_vocab = defaultdict(lambda: 0)
-
-    sm = difflib.SequenceMatcher()
-    metrics_available = False
-    with open(data_filename, 'r', encoding='utf8') as f:
-        for line in tqdm.tqdm(f):
-            item = json.loads(line)
-            if not isinstance(item['text'], str):
-                item['text'] = ''
-            num_chars = len(item['text'])
-            orig = item['text'].split()
-            num_words = len(orig)
-            for word in orig:
-                vocabulary[word] += 1
-            for char in item['text']:
-                alphabet.add(char)
-            num_hours += item['duration']
-
-            if 'pred_text' in item:
-                metrics_available = True
-                pred = item['pred_text'].split()
-                measures = jiwer.compute_measures(item['text'], item['pred_text'])
-                word_dist = measures['substitutions'] + measures['insertions'] + measures['deletions']
-                char_dist = editdistance.eval(item['text'], item['pred_text'])
-                wer_dist += word_dist
-                cer_dist += char_dist
-                wer_count += num_words
-                cer_count += num_chars
-
-                sm.set_seqs(orig, pred)
-                for m in sm.get_matching_blocks():
-                    for word_idx in range(m[0], m[0] + m[2]):
-                        match_vocab[orig[word_idx]] += 1
-                wmr_count += measures['hits']
-
-            data.append(
-                {
-                    'audio_filepath': item['audio_filepath'],
-                    'duration': round(item['duration'], 2),
-                    'num_words': num_words,
-                    'num_chars': num_chars,
-                    'word_rate': round(num_words / item['duration'], 2),
-                    'char_rate': round(num_chars / item['duration'], 2),
-                    'text': item['text'],
-                }
-            )
-            if metrics_available:
-                data[-1]['pred_text'] = item['pred_text']
-                if num_words == 0:
-                    num_words = 1e-9
-                if num_chars == 0:
-                    num_chars = 1e-9
-                data[-1]['WER'] = round(word_dist / num_words * 100.0, 2)
-                data[-1]['CER'] = round(char_dist / num_chars * 100.0, 2)
-                data[-1]['WMR'] = round(measures['hits'] / num_words * 100.0, 2)
-                data[-1]['I'] = measures['insertions']
-                data[-1]['D'] = measures['deletions']
-                data[-1]['D-I'] = measures['deletions'] - measures['insertions']
-
-            if estimate_audio:
-                filepath = absolute_audio_filepath(item['audio_filepath'], data_filename)
-                signal, sr = librosa.load(path=filepath, sr=None)
-                bw = eval_bandwidth(signal, sr)
-                item['freq_bandwidth'] = int(bw)
-                item['level_db'] = 20 * np.log10(np.max(np.abs(signal)))
-            for k in item:
-                if k not in data[-1]:
-                    data[-1][k] = item[k]
-
-    vocabulary_data = [{'word': word, 'count': vocabulary[word]} for word in vocabulary]
+    metrics_available = stats.num_pred > 0
+    num_hours = math.fsum(row_stats['duration'].tolist()) / 3600.0
+    alphabet = set(stats.alphabet)
+
+    words = list(stats.vocabulary)
+    word_counts = np.array([stats.vocabulary[word] for word in words], dtype=np.int64)
+    vocabulary_data = ColumnStore({'word': StringColumn(words), 'count': word_counts})
     if vocab is not None:
-        for item in vocabulary_data:
-            item['OOV'] = item['word'] not in vocabulary_ext
+        vocabulary_data['OOV'] = np.array([word not in vocabulary_ext for word in words], dtype=bool)
 
     if metrics_available:
-        wer = wer_dist / wer_count * 100.0
-        cer = cer_dist / cer_count * 100.0
-        wmr = wmr_count / wer_count * 100.0
-
-        acc_sum = 0
-        for item in vocabulary_data:
-            w = item['word']
-            word_accuracy = match_vocab[w] / vocabulary[w] * 100.0
-            acc_sum += word_accuracy
-            item['accuracy'] = round(word_accuracy, 1)
-        mwa = acc_sum / len(vocabulary_data)
-
-    num_hours /= 3600.0
-
-    if not disable_caching:
-        with open(pickle_filename, 'wb') as f:
-            pickle.dump(
-                [data, wer, cer, wmr, mwa, num_hours, vocabulary_data, alphabet, metrics_available],
-                f,
-                pickle.HIGHEST_PROTOCOL,
-            )
+        wer = stats.wer_dist / stats.wer_count * 100.0
+        cer = stats.cer_dist / stats.cer_count * 100.0
+        wmr = stats.wmr_count / stats.wer_count * 100.0
+
+        word_accuracy = np.array([stats.match_vocab[word] for word in words], dtype=np.float64) / word_counts * 100.0
+        vocabulary_data['accuracy'] = np.array([round(acc, 1) for acc in word_accuracy.tolist()])
+        mwa = word_accuracy.sum() / len(words)
+    vocabulary_data.build_indexes()
+
+    return (
+        data,
+        wer,
+        cer,
+        wmr,
+        mwa,
+        num_hours,
+        vocabulary_data,
+        alphabet,
+        metrics_available,
+        histograms,
+        row_stats,
+        errors_data,
+        hashes,
+        lines,
+    )
+
+
+# metrics of predictions in given field of manifest lines at given byte offsets against reference texts of the
+# corresponding rows of the main manifest, predictions are kept unless they are read from the manifest on demand
+def load_model_offsets(model_filename, offsets, field, references, keep_predictions=True):
+    rows = []
+    predictions = []
+    token_ids = {}
+    with open(model_filename, 'rb') as f:
+        for offset, text in zip(offsets, references):
+            f.seek(offset)
+            item = json.loads(f.readline())
+            pred_text = item.get(field)
+            row = {
+                'duration': round(item['duration'], 2),
+                'word_dist': 0,
+                'char_dist': 0,
+                'hits': 0,
+                'has_pred': isinstance(pred_text, str),
+                'alignment': '',
+            }
+            if isinstance(pred_text, str):
+                alignment = align_words(text.split(), pred_text.split(), token_ids)
+                script, matched, substituted, deleted, inserted = alignment
+                row['word_dist'] = len(substituted) + len(deleted) + len(inserted)
+                row['char_dist'] = Levenshtein.distance(text, pred_text)
+                row['hits'] = len(matched)
+                row['alignment'] = script
+            rows.append(row)
+            if keep_predictions:
+                predictions.append(column_string(pred_text))
+    model_stats = ColumnStore.from_rows(rows)
+    if keep_predictions:
+        model_stats['pred_text'] = StringColumn(predictions)
+    return model_stats
+
+
+def _load_model_offsets(task):
+    return load_model_offsets(*task)
+
+
+# byte offsets and content hashes of non-empty manifest lines
+def manifest_line_hashes(data_filename):
+    hashes = bytearray()
+    offsets = array('q')
+    with open(data_filename, 'rb') as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                hashes += hash_line(line)
+                offsets.append(offset)
+            offset += len(line)
+    return np.array(offsets, dtype=np.int64), bytes(hashes)
+
+
+# metrics of compared predictions are cached per manifest and prediction field, rows are keyed by hashes of the line
+# of the model and of the line of the main manifest with the reference, so they are recomputed if either changes
+def model_cache_dir(model_filename, field):
+    return '{}_{}'.format(metrics_cache_dir(model_filename), field)
+
+
+def model_row_keys(model_hashes, line_hashes):
+    return b''.join(
+        hashlib.blake2b(model_hashes[i : i + 16] + line_hashes[i : i + 16], digest_size=16).digest()
+        for i in range(0, len(model_hashes), 16)
+    )
+
 
-    return data, wer, cer, wmr, mwa, num_hours, vocabulary_data, alphabet, metrics_available
+def save_model_cache(cache_dir, keys, model_stats):
+    tmp_dir = cache_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    model_stats.save(os.path.join(tmp_dir, 'row_stats'))
+    with open(os.path.join(tmp_dir, 'lines.bin'), 'wb') as f:
+        f.write(keys)
+    # predictions are not cached when they are streamed from the manifest
+    meta = {'version': CACHE_VERSION, 'predictions': 'pred_text' in model_stats}
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf8') as f:
+        json.dump(meta, f)
+    replace_dir(tmp_dir, cache_dir)
+
+
+def load_model_cache(cache_dir, keep_predictions):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf8') as f:
+            meta = json.load(f)
+        if meta.get('version') != CACHE_VERSION or meta.get('predictions') != keep_predictions:
+            return None
+        with open(os.path.join(cache_dir, 'lines.bin'), 'rb') as f:
+            keys = f.read()
+        return {'keys': keys, 'row_stats': ColumnStore.load(os.path.join(cache_dir, 'row_stats'))}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# add predictions of compared models to data, they are given by manifests with the same lines as the main manifest
+# or by other prediction fields of the main manifest, references and other columns are shared by all models,
+# returns list of models with their name, column of predictions and per-row statistics,
+# metrics are cached if hashes of lines of the main manifest are given
+def load_models(
+    data, data_filename, row_stats, compare=(), pred_fields=(), workers=1, streaming=False, line_hashes=None
+):
+    sources = [(Path(filename).stem, filename, 'pred_text') for filename in compare]
+    sources += [(field, data_filename, field) for field in pred_fields]
+    if not sources:
+        return []
+    if pred_fields and os.path.isdir(data_filename):
+        raise ValueError('prediction fields can be compared in a JSON manifest only')
+
+    names = {Path(data_filename).stem}
+    models = []
+    # worker processes are started for the first model with lines which are not cached
+    pool = None
+    try:
+        for name, filename, field in sources:
+            # names of models are parts of column names
+            suffix = 2
+            while name in names:
+                name = '{}_{}'.format(Path(filename).stem if field == 'pred_text' else field, suffix)
+                suffix += 1
+            names.add(name)
+
+            if line_hashes is None:
+                offsets = manifest_line_offsets(filename)
+            else:
+                offsets, model_hashes = manifest_line_hashes(filename)
+            if len(offsets) != len(data):
+                raise ValueError('{} has {} lines, {} has {}'.format(filename, len(offsets), data_filename, len(data)))
+            # predictions in the main manifest are already columns of data
+            own_field = filename == data_filename
+            keep_predictions = not streaming and not own_field
+            cache = None
+            if line_hashes is not None:
+                cache_dir = model_cache_dir(filename, field)
+                cache = load_model_cache(cache_dir, keep_predictions)
+                keys = model_row_keys(model_hashes, line_hashes)
+            if cache is None:
+                num_cached = 0
+                source = np.full(len(offsets), -1, dtype=np.int64)
+            else:
+                num_cached = len(cache['keys']) // 16
+                source = match_cached_lines(cache['keys'], keys)
+
+            if cache is not None and np.array_equal(source, np.arange(num_cached)):
+                model_stats = cache['row_stats']
+            else:
+                new = np.flatnonzero(source < 0)
+                source[new] = num_cached + np.arange(len(new))
+                tasks = []
+                for i in range(0, len(new), MANIFEST_CHUNK_LINES):
+                    indices = new[i : i + MANIFEST_CHUNK_LINES]
+                    references = data['text']
+                    if isinstance(references, ManifestColumn):
+                        references = StringColumn(references.take(indices))
+                    else:
+                        references = references.select(indices)
+                    tasks.append((filename, offsets[indices], field, references, keep_predictions))
+
+                print('Computing metrics of model {} for {} new or changed lines...'.format(name, len(new)))
+                loading_progress.start('Computing metrics of model {}'.format(name), len(new))
+                if pool is None and workers > 1 and len(new):
+                    pool = worker_context().Pool(workers)
+                results = map(_load_model_offsets, tasks) if pool is None else pool.imap(_load_model_offsets, tasks)
+                parts = [] if cache is None else [cache['row_stats']]
+                for part, task in zip(tqdm.tqdm(results, total=len(tasks), unit='chunk'), tasks):
+                    loading_progress.advance(len(task[1]))
+                    parts.append(part)
+                model_stats = ColumnStore.concatenate(parts)
+                if cache is not None:
+                    model_stats = model_stats.take(source)
+                if line_hashes is not None and len(model_stats):
+                    save_model_cache(cache_dir, keys, model_stats)
+                    # continue with memory-mapped columns of the cache
+                    model_stats = load_model_cache(cache_dir, keep_predictions)['row_stats']
+            if not len(model_stats):
+                continue
+            mismatch = np.flatnonzero(model_stats['duration'] != np.asarray(data['duration']))
+            if len(mismatch):
+                raise ValueError(
+                    'line {} of {} does not match the line of {}'.format(mismatch[0] + 1, filename, data_filename)
+                )
+
+            if own_field:
+                pred_column = field
+            else:
+                pred_column = 'pred_text_' + name
+                if streaming:
+                    data[pred_column] = ManifestColumn(field, map_file(filename), offsets)
+                else:
+                    data[pred_column] = model_stats['pred_text']
+            # the same rounding of per-row metrics as for predictions of the main manifest
+            for metric, dist, count in [
+                ('WER', 'word_dist', 'num_words'),
+                ('CER', 'char_dist', 'num_chars'),
+                ('WMR', 'hits', 'num_words'),
+            ]:
+                counts = np.where(data[count] == 0, 1e-9, data[count])
+                values = np.round(model_stats[dist] / counts * 100.0, 2)
+                data['{}_{}'.format(metric, name)] = np.where(model_stats['has_pred'], values, np.nan)
+            if 'WER' in data:
+                # positive for rows where the model is worse than the main predictions, for sorting by regression
+                data['dWER_' + name] = np.round(data['WER_' + name] - data['WER'], 2)
+
+            model_row_stats = ColumnStore({'duration': row_stats['duration']})
+            for k in ['word_dist', 'char_dist', 'hits', 'has_pred', 'alignment']:
+                model_row_stats[k] = model_stats[k]
+            models.append({'name': name, 'pred': pred_column, 'row_stats': model_row_stats})
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return models
+
+
+# histogram of values in up to num_bins bins of equal width, integer values with a small range get a bin per value,
+# returns (bin edges, counts)
+def compute_histogram(values, num_bins=50, edges=None):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        values = values[np.isfinite(values)]
+    if edges is None:
+        if len(values) == 0:
+            edges = np.array([0.0, 1.0])
+        else:
+            low, high = values.min().item(), values.max().item()
+            if high - low < num_bins and np.array_equal(values, np.round(values)):
+                edges = np.arange(low, high + 2) - 0.5
+            else:
+                edges = np.histogram_bin_edges(values, bins=num_bins, range=(low, high))
+    counts, _ = np.histogram(values, bins=edges)
+    return edges, counts
 
 
-# plot histogram of specified field in data list
-def plot_histogram(data, key, label):
-    fig = px.histogram(
-        data_frame=[item[key] for item in data],
-        nbins=50,
-        log_y=True,
-        labels={'value': label},
-        opacity=0.5,
-        color_discrete_sequence=['green'],
-        height=200,
+# plot histogram binned by compute_histogram
+def plot_histogram(histogram, label):
+    edges, counts = histogram
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                marker_color='green',
+                opacity=0.5,
+                hovertemplate=label + ': %{x}<br>count: %{y}<extra></extra>',
+            )
+        ],
+        layout=go.Layout(height=200, bargap=0, yaxis_type='log', xaxis_title=label, yaxis_title='count'),
     )
     fig.update_layout(showlegend=False, margin=dict(l=0, r=0, t=0, b=0, pad=0))
     return fig
@@ -288,14 +2205,12 @@ def plot_histogram(data, key, label):
 
 def plot_word_accuracy(vocabulary_data):
     labels = ['Unrecognized', 'Sometimes recognized', 'Always recognized']
-    counts = [0, 0, 0]
-    for word in vocabulary_data:
-        if word['accuracy'] == 0:
-            counts[0] += 1
-        elif word['accuracy'] < 100:
-            counts[1] += 1
-        else:
-            counts[2] += 1
+    accuracy = vocabulary_data['accuracy']
+    counts = [
+        int(np.count_nonzero(accuracy == 0)),
+        int(np.count_nonzero((accuracy != 0) & (accuracy < 100))),
+        int(np.count_nonzero(accuracy >= 100)),
+    ]
     colors = ['red', 'orange', 'green']
 
     fig = go.Figure(
@@ -325,7 +2240,7 @@ def absolute_audio_filepath(audio_filepath, manifest_path):
 
     if not audio_filepath.is_file() and not audio_filepath.is_absolute():
         # assume audio_filepath is relative to the directory where the manifest is stored
-        manifest_dir = Path(args.manifest).parent
+        manifest_dir = Path(manifest_path).parent
         audio_filepath = manifest_dir / audio_filepath
         if audio_filepath.is_file():
             filename = str(audio_filepath)
@@ -337,18 +2252,506 @@ def absolute_audio_filepath(audio_filepath, manifest_path):
     return filename
 
 
-args = parse_args()
-print('Loading data...')
-data, wer, cer, wmr, mwa, num_hours, vocabulary, alphabet, metrics_available = load_data(
-    args.manifest, args.disable_caching_metrics, args.estimate_audio_metrics, args.vocab
-)
-print('Starting server...')
-app = dash.Dash(
-    __name__,
-    suppress_callback_exceptions=True,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    title=os.path.basename(args.manifest),
-)
+# read segment [offset, offset + duration] of audio file as mono signal, only the needed frames are decoded
+def load_audio_segment(filename, offset=None, duration=None):
+    try:
+        with sf.SoundFile(filename) as f:
+            sr = f.samplerate
+            if offset is not None:
+                start = int(offset * sr)
+                f.seek(min(start, f.frames))
+                signal = f.read(max(int((offset + duration) * sr) - start, 0), dtype='float32', always_2d=True)
+            else:
+                signal = f.read(dtype='float32', always_2d=True)
+        # mix down to mono like librosa.load
+        return signal.mean(axis=1, dtype=np.float32), sr
+    except RuntimeError:
+        # formats not supported by libsndfile are decoded by librosa
+        signal, sr = librosa.load(path=filename, sr=None)
+        if offset is not None:
+            signal = signal[int(offset * sr) : int((offset + duration) * sr)]
+        return signal, sr
+
+
+# encodings of audio served to the player: soundfile format, subtype and MIME type
+AUDIO_FORMATS = {
+    'wav': ('WAV', 'PCM_16', 'audio/wav'),
+    'flac': ('FLAC', 'PCM_16', 'audio/flac'),
+    'opus': ('OGG', 'OPUS', 'audio/ogg'),
+}
+OPUS_SAMPLE_RATES = [8000, 12000, 16000, 24000, 48000]
+
+
+# encode signal to bytes of audio file
+def encode_audio(signal, sr, audio_format):
+    file_format, subtype, _ = AUDIO_FORMATS[audio_format]
+    if subtype == 'OPUS' and sr not in OPUS_SAMPLE_RATES:
+        # Opus supports only a few sample rates, resample to the closest higher one
+        target_sr = next((r for r in OPUS_SAMPLE_RATES if r > sr), OPUS_SAMPLE_RATES[-1])
+        signal = librosa.resample(signal, orig_sr=sr, target_sr=target_sr)
+        sr = target_sr
+    with io.BytesIO() as buf:
+        sf.write(buf, signal, sr, format=file_format, subtype=subtype)
+        return buf.getvalue()
+
+
+# least recently used values limited by total size of their arrays, shared by callbacks running in several threads,
+# concurrent requests of the same missing key wait for one computation
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    @staticmethod
+    def size(value):
+        return sum(v.nbytes for v in value if isinstance(v, np.ndarray))
+
+    def _lookup(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def get(self, key, compute):
+        with self.lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            key_lock = self.pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self.lock:
+                value = self._lookup(key)
+                if value is not None:
+                    return value
+                self.misses += 1
+            try:
+                value = compute()
+            except BaseException:
+                with self.lock:
+                    self.pending.pop(key, None)
+                raise
+            size = self.size(value)
+            # value is inserted before the key lock is dropped, so that later requests find it instead of computing it
+            with self.lock:
+                self.pending.pop(key, None)
+                if size <= self.max_bytes and key not in self.items:
+                    self.items[key] = value
+                    self.nbytes += size
+                    while self.nbytes > self.max_bytes:
+                        _, evicted = self.items.popitem(last=False)
+                        self.nbytes -= self.size(evicted)
+                        self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                'items': len(self.items),
+                'bytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# key of audio segment of manifest row
+def audio_segment_key(row, manifest_path=None):
+    filename = absolute_audio_filepath(row['audio_filepath'], manifest_path or args.manifest)
+    offset = row.get('offset')
+    return filename, offset, row['duration'] if offset is not None else None
+
+
+# spectrogram and envelope of manifest row from signal store, None if they were not prepared
+def load_stored_signal(row, n_fft, time_stride):
+    if signal_store is None or (signal_store.n_fft, signal_store.time_stride) != (n_fft, time_stride):
+        return None
+    return signal_store.get(signal_key(*audio_segment_key(row)))
+
+
+# decoded audio segment of manifest row, returns (signal, sample rate)
+def load_selected_audio(row):
+    key = audio_segment_key(row)
+    return audio_cache.get(('audio',) + key, lambda: load_audio_segment(*key))
+
+
+# spectrogram in dB of audio segment of manifest row, returns (spectrogram, sample rate)
+def load_selected_spectrogram(row, n_fft=512, time_stride=0.01):
+    def compute():
+        audio, fs = load_selected_audio(row)
+        return compute_spectrogram(audio, fs, n_fft, time_stride), fs
+
+    return audio_cache.get(('spectrogram', n_fft, time_stride) + audio_segment_key(row), compute)
+
+
+# linear scale spectrogram in dB
+def compute_spectrogram(audio, fs, n_fft=512, time_stride=0.01):
+    s = librosa.stft(y=audio, n_fft=n_fft, hop_length=int(fs * time_stride))
+    return librosa.power_to_db(S=np.abs(s) ** 2, ref=np.max, top_db=100)
+
+
+# number of waveform buckets and spectrogram frames sent to the browser, independent of audio length
+WAVEFORM_BUCKETS = 2000
+SPECTROGRAM_FRAMES = 1000
+
+
+# min/max envelope of signal[start:end] in buckets of equal size, returns (times, values),
+# samples are returned as they are when there are not many more of them than buckets
+def waveform_envelope(signal, sr, start, end, num_buckets=WAVEFORM_BUCKETS):
+    segment = signal[start:end]
+    step = -(-len(segment) // num_buckets)
+    if step <= 2:
+        return (start + np.arange(len(segment))) / sr, segment
+    bounds = np.arange(0, len(segment), step)
+    return envelope_points(np.minimum.reduceat(segment, bounds), np.maximum.reduceat(segment, bounds), start, step, sr)
+
+
+# envelope of samples [start, end) from stored min/max pairs of buckets of ENVELOPE_BUCKET samples,
+# pairs are merged so that there are at most num_buckets of them
+def stored_envelope(envelope, sr, start, end, num_buckets=WAVEFORM_BUCKETS):
+    first, last = start // ENVELOPE_BUCKET, -(-end // ENVELOPE_BUCKET)
+    step = max(-(-(last - first) // num_buckets), 1)
+    bounds = np.arange(0, last - first, step)
+    # envelopes are stored as float16, which plotly does not serialize
+    mins = np.minimum.reduceat(envelope[first:last, 0], bounds).astype(np.float32)
+    maxs = np.maximum.reduceat(envelope[first:last, 1], bounds).astype(np.float32)
+    return envelope_points(mins, maxs, first * ENVELOPE_BUCKET, step * ENVELOPE_BUCKET, sr)
+
+
+# interleaved minimums and maximums of consecutive buckets of step samples starting at sample start
+def envelope_points(mins, maxs, start, step, sr):
+    values = np.empty(2 * len(mins), dtype=mins.dtype)
+    values[0::2] = mins
+    values[1::2] = maxs
+    times = np.repeat((start + step * np.arange(len(mins))) / sr, 2)
+    times[1::2] += step / 2 / sr
+    return times, values
+
+
+# frames [start, end) of spectrogram pooled by maximum to at most num_frames and quantized to 1 dB,
+# returns (spectrogram, number of frames pooled together)
+def spectrogram_lod(s_db, start, end, num_frames=SPECTROGRAM_FRAMES):
+    segment = s_db[:, start:end]
+    step = max(-(-segment.shape[1] // num_frames), 1)
+    if step > 1:
+        segment = np.maximum.reduceat(segment, np.arange(0, segment.shape[1], step), axis=1)
+    return np.round(segment).astype(np.int8), step
+
+
+# visible time range of zoomed signal graph from its relayout event, None if not zoomed
+def signal_view_range(relayout_data):
+    for axis in ['xaxis', 'xaxis2']:
+        if f'{axis}.range[0]' in relayout_data:
+            return [relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']]
+        if f'{axis}.range' in relayout_data:
+            return list(relayout_data[f'{axis}.range'])
+    return None
+
+
+SIGNAL_STORE_VERSION = 1
+# number of samples summarized by one min/max pair of stored waveform envelope
+ENVELOPE_BUCKET = 64
+
+
+def signal_store_dir(data_filename):
+    return data_filename.split('.json')[0] + '_sde_signals'
+
+
+# key of audio segment in signal store, stored segments become stale when audio file is modified
+def signal_key(filename, offset, duration):
+    st = os.stat(filename)
+    key = '\0'.join(str(v) for v in [os.path.abspath(filename), st.st_size, st.st_mtime_ns, offset, duration])
+    return int.from_bytes(hashlib.blake2b(key.encode('utf8'), digest_size=8).digest(), 'little')
+
+
+# spectrogram quantized to 1 dB (frames x bins) and min/max envelope of audio segment,
+# returns (spectrogram, envelope, sample rate, number of samples)
+def prepare_signal(segment, n_fft=512, time_stride=0.01):
+    audio, sr = load_audio_segment(*segment)
+    spectrogram = np.round(compute_spectrogram(audio, sr, n_fft, time_stride).T).astype(np.int8)
+    envelope = np.zeros((-(-len(audio) // ENVELOPE_BUCKET), 2), dtype=np.float16)
+    if len(audio):
+        bounds = np.arange(0, len(audio), ENVELOPE_BUCKET)
+        envelope[:, 0] = np.minimum.reduceat(audio, bounds)
+        envelope[:, 1] = np.maximum.reduceat(audio, bounds)
+    return spectrogram, envelope, sr, len(audio)
+
+
+def _prepare_signal(task):
+    key, segment = task
+    try:
+        return key, prepare_signal(segment)
+    except Exception as ex:
+        return key, ex
+
+
+# precomputed spectrograms and waveform envelopes of audio segments, memory-mapped from directory
+class SignalStore:
+    def __init__(self, path, meta):
+        self.n_fft = meta['n_fft']
+        self.time_stride = meta['time_stride']
+        self.entries = ColumnStore.load(os.path.join(path, 'entries'))
+        self.keys = self.entries['key']
+        self.spectrograms = np.frombuffer(map_file(os.path.join(path, 'spectrograms.bin')), dtype=np.int8).reshape(
+            -1, self.n_fft // 2 + 1
+        )
+        self.envelopes = np.frombuffer(map_file(os.path.join(path, 'envelopes.bin')), dtype=np.float16).reshape(-1, 2)
+
+    # returns None if store is missing or was prepared by another version
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r', encoding='utf8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != SIGNAL_STORE_VERSION:
+            return None
+        return cls(path, meta)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # returns (spectrogram, envelope, sample rate, number of samples) or None if segment is not stored
+    def get(self, key):
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        e = {k: int(self.entries[k][i]) for k in ['spec_start', 'spec_end', 'env_start', 'env_end', 'sr', 'samples']}
+        return (
+            self.spectrograms[e['spec_start'] : e['spec_end']],
+            self.envelopes[e['env_start'] : e['env_end']],
+            e['sr'],
+            e['samples'],
+        )
+
+
+# compute spectrograms and envelopes of all audio segments of manifest into signal store,
+# segments found in the existing store are copied from it
+def prepare_signal_store(data, data_filename, workers=1):
+    store_dir = signal_store_dir(data_filename)
+    previous = SignalStore.load(store_dir)
+    segments = {}
+    offsets = data.column_values('offset') if 'offset' in data else [None] * len(data)
+    durations = data.column_values('duration')
+    for audio_filepath, offset, duration in zip(data['audio_filepath'], offsets, durations):
+        row = {'audio_filepath': audio_filepath, 'offset': offset, 'duration': duration}
+        segment = audio_segment_key(row, data_filename)
+        try:
+            segments.setdefault(signal_key(*segment), segment)
+        except OSError as ex:
+            print(f'Skipping {segment[0]}: {ex}')
+
+    tmp_dir = store_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    tasks = []
+    entries = {k: [] for k in ['key', 'spec_start', 'spec_end', 'env_start', 'env_end', 'sr', 'samples']}
+    num_frames = 0
+    num_buckets = 0
+    with open(os.path.join(tmp_dir, 'spectrograms.bin'), 'wb') as spec_file, open(
+        os.path.join(tmp_dir, 'envelopes.bin'), 'wb'
+    ) as env_file:
+
+        def write(key, spectrogram, envelope, sr, samples):
+            nonlocal num_frames, num_buckets
+            spec_file.write(np.ascontiguousarray(spectrogram).tobytes())
+            env_file.write(np.ascontiguousarray(envelope).tobytes())
+            spec_end, env_end = num_frames + len(spectrogram), num_buckets + len(envelope)
+            for k, v in zip(entries, [key, num_frames, spec_end, num_buckets, env_end, sr, samples]):
+                entries[k].append(v)
+            num_frames, num_buckets = spec_end, env_end
+
+        for key, segment in segments.items():
+            stored = previous.get(key) if previous is not None else None
+            if stored is not None:
+                write(key, *stored)
+            else:
+                tasks.append((key, segment))
+
+        print('Preparing {} audio segments, {} are up to date...'.format(len(tasks), len(segments) - len(tasks)))
+        results = imap_unordered_workers(_prepare_signal, tasks, workers)
+        for key, result in tqdm.tqdm(results, total=len(tasks), unit=' segments'):
+            if isinstance(result, Exception):
+                print(f'Skipping {segments[key][0]}: {result}')
+            else:
+                write(key, *result)
+
+    order = np.argsort(np.array(entries['key'], dtype=np.uint64), kind='stable')
+    ColumnStore(
+        {k: np.array(v, dtype=np.uint64 if k == 'key' else np.int64)[order] for k, v in entries.items()}
+    ).save(os.path.join(tmp_dir, 'entries'))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf8') as f:
+        json.dump({'version': SIGNAL_STORE_VERSION, 'n_fft': 512, 'time_stride': 0.01}, f)
+    replace_dir(tmp_dir, store_dir)
+    print('Prepared {} audio segments in {}'.format(len(order), store_dir))
+
+
+# exported tables are read, converted and sent in chunks of this many rows, so memory usage does not depend on the
+# number of exported rows
+EXPORT_CHUNK_ROWS = 2 ** 12
+# export format -> (label, mimetype)
+EXPORT_FORMATS = {
+    'csv': ('CSV', 'text/csv'),
+    'jsonl': ('JSON lines', 'application/x-ndjson'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def export_formats():
+    return [k for k in EXPORT_FORMATS if k != 'parquet' or pyarrow is not None]
+
+
+# file-like sink of Parquet writer, written bytes are kept until they are taken
+class ExportBuffer(io.RawIOBase):
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        self.position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        chunk = b''.join(self.parts)
+        self.parts = []
+        return chunk
+
+
+def parquet_schema(store):
+    fields = []
+    for k in store.keys():
+        column = store[k]
+        kind = pyarrow.string() if isinstance(column, StringColumn) else pyarrow.from_numpy_dtype(column.dtype)
+        fields.append(pyarrow.field(k, kind))
+    return pyarrow.schema(fields)
+
+
+# encoded rows of store at given indices in CSV, JSON lines or Parquet format, yields a chunk of the file for every
+# EXPORT_CHUNK_ROWS rows, missing values are empty in CSV, left out in JSON lines and null in Parquet
+def export_rows(store, indices, export_format):
+    keys = store.keys()
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(keys)
+    elif export_format == 'parquet':
+        schema = parquet_schema(store)
+        buffer = ExportBuffer()
+        writer = pyarrow.parquet.ParquetWriter(buffer, schema)
+    for start in range(0, len(indices), EXPORT_CHUNK_ROWS):
+        chunk = indices[start : start + EXPORT_CHUNK_ROWS]
+        if export_format == 'parquet':
+            arrays = []
+            for k, field in zip(keys, schema):
+                column = store[k]
+                if isinstance(column, StringColumn):
+                    arrays.append(pyarrow.array(column.take(chunk), type=field.type))
+                else:
+                    arrays.append(pyarrow.array(column[chunk], type=field.type, from_pandas=True))
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            yield buffer.take()
+            continue
+        rows = zip(*[store.column_values(k, chunk) for k in keys])
+        if export_format == 'csv':
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        else:
+            # fields missing in a manifest line are left out
+            lines = [{k: v for k, v in zip(keys, row) if v is not None} for row in rows]
+            yield ''.join(json.dumps(line, ensure_ascii=False) + '\n' for line in lines).encode('utf-8')
+    if export_format == 'csv' and not len(indices):
+        yield buffer.getvalue().encode('utf-8')
+    elif export_format == 'parquet':
+        writer.close()
+        yield buffer.take()
+
+
+# raw lines at given indices, yields a chunk of the file for every EXPORT_CHUNK_ROWS lines
+def export_lines(lines, indices):
+    for start in range(0, len(indices), EXPORT_CHUNK_ROWS):
+        yield b''.join(line + b'\n' for line in lines.take(indices[start : start + EXPORT_CHUNK_ROWS]))
+
+
+# command-line arguments, set by configure()
+args = None
+audio_cache = None
+
+
+# load data and prepare queries of its tables
+def load_dataset():
+    global data, wer, cer, wmr, mwa, num_hours, vocabulary, alphabet, metrics_available, histograms, row_stats
+    global errors, models, data_query, stats_query, vocabulary_query, errors_query, manifest_lines
+    print('Loading data...')
+    with metrics_cache_lock(args.manifest, args.disable_caching_metrics):
+        loaded = load_data(
+            args.manifest,
+            args.disable_caching_metrics,
+            args.estimate_audio_metrics,
+            args.vocab,
+            args.workers,
+            args.text_index,
+            args.streaming,
+        )
+        (
+            data,
+            wer,
+            cer,
+            wmr,
+            mwa,
+            num_hours,
+            vocabulary,
+            alphabet,
+            metrics_available,
+            histograms,
+            row_stats,
+            errors,
+            line_hashes,
+            manifest_lines,
+        ) = loaded
+        # caches of metrics of compared models are written under the lock as well
+        with perf_metrics.stage('models'):
+            models = load_models(
+                data,
+                args.manifest,
+                row_stats,
+                args.compare,
+                args.pred_fields,
+                args.workers,
+                args.streaming,
+                line_hashes,
+            )
+    if models:
+        # columns of compared models are not stored in the metrics cache
+        data.build_indexes()
+        for k in data.keys():
+            if data.is_numeric(k) and k not in histograms:
+                histograms[k] = compute_histogram(data[k])
+    print('Loaded {} utterances, {:.1f} MB in memory'.format(len(data), (data.nbytes + vocabulary.nbytes) / 2 ** 20))
+    if peak_memory() is not None:
+        print('Peak memory usage {:.1f} MB'.format(peak_memory()))
+    data_query = TableQuery(data)
+    stats_query = TableQuery(data)
+    vocabulary_query = TableQuery(vocabulary)
+    errors_query = TableQuery(errors)
+
+
+app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
 figures_labels = {
     'duration': ['Duration', 'Duration, sec'],
@@ -365,87 +2768,55 @@ figures_labels = {
     'freq_bandwidth': ['Frequency Bandwidth', 'Bandwidth, Hz'],
     'level_db': ['Peak Level', 'Level, dB'],
 }
-figures_hist = {}
-for k in data[0]:
-    val = data[0][k]
-    if isinstance(val, (int, float)) and not isinstance(val, bool):
-        if k in figures_labels:
-            ylabel = figures_labels[k][0]
-            xlabel = figures_labels[k][1]
-        else:
-            title = k.replace('_', ' ')
-            title = title[0].upper() + title[1:].lower()
-            ylabel = title
-            xlabel = title
-        figures_hist[k] = [ylabel + ' (per utterance)', plot_histogram(data, k, xlabel)]
-
-if metrics_available:
-    figure_word_acc = plot_word_accuracy(vocabulary)
-
-stats_layout = [
-    dbc.Row(dbc.Col(html.H5(children='Global Statistics'), class_name='text-secondary'), class_name='mt-3'),
-    dbc.Row(
-        [
-            dbc.Col(html.Div('Number of hours', className='text-secondary'), width=3, class_name='border-end'),
-            dbc.Col(html.Div('Number of utterances', className='text-secondary'), width=3, class_name='border-end'),
-            dbc.Col(html.Div('Vocabulary size', className='text-secondary'), width=3, class_name='border-end'),
-            dbc.Col(html.Div('Alphabet size', className='text-secondary'), width=3),
-        ],
-        class_name='bg-light mt-2 rounded-top border-top border-start border-end',
-    ),
-    dbc.Row(
-        [
-            dbc.Col(
-                html.H5(
-                    '{:.2f} hours'.format(num_hours),
-                    className='text-center p-1',
-                    style={'color': 'green', 'opacity': 0.7},
-                ),
-                width=3,
-                class_name='border-end',
-            ),
-            dbc.Col(
-                html.H5(len(data), className='text-center p-1', style={'color': 'green', 'opacity': 0.7}),
-                width=3,
-                class_name='border-end',
-            ),
-            dbc.Col(
-                html.H5(
-                    '{} words'.format(len(vocabulary)),
-                    className='text-center p-1',
-                    style={'color': 'green', 'opacity': 0.7},
-                ),
-                width=3,
-                class_name='border-end',
-            ),
-            dbc.Col(
-                html.H5(
-                    '{} chars'.format(len(alphabet)),
-                    className='text-center p-1',
-                    style={'color': 'green', 'opacity': 0.7},
-                ),
-                width=3,
-            ),
-        ],
-        class_name='bg-light rounded-bottom border-bottom border-start border-end',
-    ),
-]
-if metrics_available:
-    stats_layout += [
+# histograms of numeric columns, maps column to [title, figure, x axis label]
+def make_figures_hist():
+    labels = dict(figures_labels)
+    for model in models:
+        for metric in ['WER', 'CER', 'WMR']:
+            labels['{}_{}'.format(metric, model['name'])] = [
+                '{} of {}'.format(figures_labels[metric][0], model['name']),
+                figures_labels[metric][1],
+            ]
+        labels['dWER_' + model['name']] = ['WER Difference of {} and pred_text'.format(model['name']), 'WER, %']
+    figures_hist = {}
+    for k in data.keys():
+        if data.is_numeric(k):
+            if k in labels:
+                ylabel = labels[k][0]
+                xlabel = labels[k][1]
+            else:
+                title = k.replace('_', ' ')
+                title = title[0].upper() + title[1:].lower()
+                ylabel = title
+                xlabel = title
+            figures_hist[k] = [ylabel + ' (per utterance)', plot_histogram(histograms[k], xlabel), xlabel]
+    return figures_hist
+
+
+# per-row statistics of predictions of the main manifest and of compared models with names of the models
+def models_row_stats():
+    return [(Path(args.manifest).stem + ' (pred_text)', row_stats)] + [
+        (model['name'], model['row_stats']) for model in models
+    ]
+
+
+def make_stats_layout():
+    if metrics_available:
+        figure_word_acc = plot_word_accuracy(vocabulary)
+
+    stats_layout = [
+        dbc.Row(
+            dbc.Col(html.H5(id='stats-title', children='Global Statistics'), class_name='text-secondary'),
+            class_name='mt-3',
+        ),
         dbc.Row(
             [
+                dbc.Col(html.Div('Number of hours', className='text-secondary'), width=3, class_name='border-end'),
                 dbc.Col(
-                    html.Div('Word Error Rate (WER), %', className='text-secondary'), width=3, class_name='border-end'
-                ),
-                dbc.Col(
-                    html.Div('Character Error Rate (CER), %', className='text-secondary'),
-                    width=3,
-                    class_name='border-end',
-                ),
-                dbc.Col(
-                    html.Div('Word Match Rate (WMR), %', className='text-secondary'), width=3, class_name='border-end',
+                    html.Div('Number of utterances', className='text-secondary'), width=3, class_name='border-end'
                 ),
-                dbc.Col(html.Div('Mean Word Accuracy, %', className='text-secondary'), width=3),
+                dbc.Col(html.Div('Vocabulary size', className='text-secondary'), width=3, class_name='border-end'),
+                dbc.Col(html.Div('Alphabet size', className='text-secondary'), width=3),
             ],
             class_name='bg-light mt-2 rounded-top border-top border-start border-end',
         ),
@@ -453,28 +2824,38 @@ if metrics_available:
             [
                 dbc.Col(
                     html.H5(
-                        '{:.2f}'.format(wer), className='text-center p-1', style={'color': 'green', 'opacity': 0.7},
+                        '{:.2f} hours'.format(num_hours),
+                        id='stats-hours',
+                        className='text-center p-1',
+                        style={'color': 'green', 'opacity': 0.7},
                     ),
                     width=3,
                     class_name='border-end',
                 ),
                 dbc.Col(
                     html.H5(
-                        '{:.2f}'.format(cer), className='text-center p-1', style={'color': 'green', 'opacity': 0.7}
+                        len(data),
+                        id='stats-utterances',
+                        className='text-center p-1',
+                        style={'color': 'green', 'opacity': 0.7},
                     ),
                     width=3,
                     class_name='border-end',
                 ),
                 dbc.Col(
                     html.H5(
-                        '{:.2f}'.format(wmr), className='text-center p-1', style={'color': 'green', 'opacity': 0.7},
+                        '{} words'.format(len(vocabulary)),
+                        className='text-center p-1',
+                        style={'color': 'green', 'opacity': 0.7},
                     ),
                     width=3,
                     class_name='border-end',
                 ),
                 dbc.Col(
                     html.H5(
-                        '{:.2f}'.format(mwa), className='text-center p-1', style={'color': 'green', 'opacity': 0.7},
+                        '{} chars'.format(len(alphabet)),
+                        className='text-center p-1',
+                        style={'color': 'green', 'opacity': 0.7},
                     ),
                     width=3,
                 ),
@@ -482,85 +2863,204 @@ if metrics_available:
             class_name='bg-light rounded-bottom border-bottom border-start border-end',
         ),
     ]
-stats_layout += [
-    dbc.Row(dbc.Col(html.H5(children='Alphabet'), class_name='text-secondary'), class_name='mt-3'),
-    dbc.Row(
-        dbc.Col(html.Div('{}'.format(sorted(alphabet))),), class_name='mt-2 bg-light font-monospace rounded border'
-    ),
-]
-for k in figures_hist:
+    if metrics_available:
+        stats_layout += [
+            dbc.Row(
+                [
+                    dbc.Col(
+                        html.Div('Word Error Rate (WER), %', className='text-secondary'),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(
+                        html.Div('Character Error Rate (CER), %', className='text-secondary'),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(
+                        html.Div('Word Match Rate (WMR), %', className='text-secondary'),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(html.Div('Mean Word Accuracy, %', className='text-secondary'), width=3),
+                ],
+                class_name='bg-light mt-2 rounded-top border-top border-start border-end',
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        html.H5(
+                            '{:.2f}'.format(wer),
+                            id={'type': 'stats-metric', 'metric': 'wer'},
+                            className='text-center p-1',
+                            style={'color': 'green', 'opacity': 0.7},
+                        ),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(
+                        html.H5(
+                            '{:.2f}'.format(cer),
+                            id={'type': 'stats-metric', 'metric': 'cer'},
+                            className='text-center p-1',
+                            style={'color': 'green', 'opacity': 0.7},
+                        ),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(
+                        html.H5(
+                            '{:.2f}'.format(wmr),
+                            id={'type': 'stats-metric', 'metric': 'wmr'},
+                            className='text-center p-1',
+                            style={'color': 'green', 'opacity': 0.7},
+                        ),
+                        width=3,
+                        class_name='border-end',
+                    ),
+                    dbc.Col(
+                        html.H5(
+                            '{:.2f}'.format(mwa),
+                            id={'type': 'stats-metric', 'metric': 'mwa'},
+                            className='text-center p-1',
+                            style={'color': 'green', 'opacity': 0.7},
+                        ),
+                        width=3,
+                    ),
+                ],
+                class_name='bg-light rounded-bottom border-bottom border-start border-end',
+            ),
+        ]
+    if models:
+        all_indices = np.arange(len(data))
+        rows = []
+        for name, model_row_stats in models_row_stats():
+            metrics = rows_metrics(data, model_row_stats, all_indices)
+            rows.append(
+                html.Tr(
+                    [html.Td(name)]
+                    + [
+                        html.Td(
+                            '{:.2f}'.format(metrics[k]) if k in metrics else '-',
+                            id={'type': 'model-metric', 'model': name, 'metric': k},
+                        )
+                        for k in ['wer', 'cer', 'wmr']
+                    ]
+                )
+            )
+        stats_layout += [
+            dbc.Row(dbc.Col(html.H5('Models'), class_name='text-secondary'), class_name='mt-3'),
+            dbc.Row(
+                dbc.Col(
+                    dbc.Table(
+                        [
+                            html.Thead(html.Tr([html.Th(k) for k in ['Model', 'WER, %', 'CER, %', 'WMR, %']])),
+                            html.Tbody(rows),
+                        ],
+                        bordered=True,
+                        size='sm',
+                        class_name='bg-light text-center',
+                    )
+                ),
+                class_name='mt-2',
+            ),
+        ]
     stats_layout += [
-        dbc.Row(dbc.Col(html.H5(figures_hist[k][0]), class_name='text-secondary'), class_name='mt-3'),
-        dbc.Row(dbc.Col(dcc.Graph(id='duration-graph', figure=figures_hist[k][1]),),),
+        dbc.Row(dbc.Col(html.H5(children='Alphabet'), class_name='text-secondary'), class_name='mt-3'),
+        dbc.Row(
+            dbc.Col(html.Div('{}'.format(sorted(alphabet))),), class_name='mt-2 bg-light font-monospace rounded border'
+        ),
     ]
+    for k in figures_hist:
+        stats_layout += [
+            dbc.Row(dbc.Col(html.H5(figures_hist[k][0]), class_name='text-secondary'), class_name='mt-3'),
+            dbc.Row(dbc.Col(dcc.Graph(id={'type': 'hist', 'column': k}, figure=figures_hist[k][1]),),),
+        ]
+
+    if metrics_available:
+        stats_layout += [
+            dbc.Row(dbc.Col(html.H5('Word accuracy distribution'), class_name='text-secondary'), class_name='mt-3'),
+            dbc.Row(dbc.Col(dcc.Graph(id='word-acc-graph', figure=figure_word_acc),),),
+        ]
+
+    wordstable_columns = [{'name': 'Word', 'id': 'word'}, {'name': 'Count', 'id': 'count'}]
+    if 'OOV' in vocabulary:
+        wordstable_columns.append({'name': 'OOV', 'id': 'OOV'})
+    if metrics_available:
+        wordstable_columns.append({'name': 'Accuracy, %', 'id': 'accuracy'})
 
-if metrics_available:
     stats_layout += [
-        dbc.Row(dbc.Col(html.H5('Word accuracy distribution'), class_name='text-secondary'), class_name='mt-3'),
-        dbc.Row(dbc.Col(dcc.Graph(id='word-acc-graph', figure=figure_word_acc),),),
+        dbc.Row(dbc.Col(html.H5('Vocabulary'), class_name='text-secondary'), class_name='mt-3'),
+        dbc.Row(
+            dbc.Col(
+                dash_table.DataTable(
+                    id='wordstable',
+                    columns=wordstable_columns,
+                    filter_action='custom',
+                    filter_query='',
+                    sort_action='custom',
+                    sort_mode='single',
+                    page_action='custom',
+                    page_current=0,
+                    page_size=DATA_PAGE_SIZE,
+                    cell_selectable=False,
+                    page_count=math.ceil(len(vocabulary) / DATA_PAGE_SIZE),
+                    sort_by=[{'column_id': 'word', 'direction': 'asc'}],
+                    style_cell={'maxWidth': 0, 'textAlign': 'left'},
+                    style_header={'color': 'text-primary'},
+                    css=[{'selector': '.dash-filter--case', 'rule': 'display: none'},],
+                ),
+            ),
+            class_name='m-2',
+        ),
+        dbc.Row(dbc.Col(make_export_links('vocabulary')), class_name='m-2'),
     ]
 
-wordstable_columns = [{'name': 'Word', 'id': 'word'}, {'name': 'Count', 'id': 'count'}]
-if 'OOV' in vocabulary[0]:
-    wordstable_columns.append({'name': 'OOV', 'id': 'OOV'})
-if metrics_available:
-    wordstable_columns.append({'name': 'Accuracy, %', 'id': 'accuracy'})
-
-stats_layout += [
-    dbc.Row(dbc.Col(html.H5('Vocabulary'), class_name='text-secondary'), class_name='mt-3'),
-    dbc.Row(
-        dbc.Col(
-            dash_table.DataTable(
-                id='wordstable',
-                columns=wordstable_columns,
-                filter_action='custom',
-                filter_query='',
-                sort_action='custom',
-                sort_mode='single',
-                page_action='custom',
-                page_current=0,
-                page_size=DATA_PAGE_SIZE,
-                cell_selectable=False,
-                page_count=math.ceil(len(vocabulary) / DATA_PAGE_SIZE),
-                sort_by=[{'column_id': 'word', 'direction': 'asc'}],
-                style_cell={'maxWidth': 0, 'textAlign': 'left'},
-                style_header={'color': 'text-primary'},
-                css=[{'selector': '.dash-filter--case', 'rule': 'display: none'},],
+    if metrics_available:
+        # word errors of all rows are counted when data is loaded, so the table is a query of prebuilt counts
+        stats_layout += [
+            dbc.Row(dbc.Col(html.H5('Word errors'), class_name='text-secondary'), class_name='mt-3'),
+            dbc.Row(
+                dbc.Col(
+                    dash_table.DataTable(
+                        id='errorstable',
+                        columns=[
+                            {'name': 'Error', 'id': 'error'},
+                            {'name': 'Word', 'id': 'word'},
+                            {'name': 'Prediction', 'id': 'pred'},
+                            {'name': 'Count', 'id': 'count'},
+                        ],
+                        filter_action='custom',
+                        filter_query='',
+                        sort_action='custom',
+                        sort_mode='single',
+                        page_action='custom',
+                        page_current=0,
+                        page_size=DATA_PAGE_SIZE,
+                        cell_selectable=False,
+                        page_count=math.ceil(len(errors) / DATA_PAGE_SIZE),
+                        sort_by=[{'column_id': 'count', 'direction': 'desc'}],
+                        style_cell={'maxWidth': 0, 'textAlign': 'left'},
+                        style_header={'color': 'text-primary'},
+                        css=[{'selector': '.dash-filter--case', 'rule': 'display: none'},],
+                    ),
+                ),
+                class_name='m-2',
             ),
-        ),
-        class_name='m-2',
-    ),
-    dbc.Row(dbc.Col([html.Button('Download Vocabulary', id='btn_csv'), dcc.Download(id='download-vocab-csv'),]),),
-]
+            dbc.Row(dbc.Col(make_export_links('errors')), class_name='m-2'),
+        ]
+    return stats_layout
 
 
 @app.callback(
-    Output('download-vocab-csv', 'data'),
-    [Input('btn_csv', 'n_clicks'), State('wordstable', 'sort_by'), State('wordstable', 'filter_query')],
-    prevent_initial_call=True,
+    Output({'type': 'export', 'table': 'vocabulary', 'format': ALL}, 'href'),
+    [Input('wordstable', 'sort_by'), Input('wordstable', 'filter_query')],
 )
-def download_vocabulary(n_clicks, sort_by, filter_query):
-    vocabulary_view = vocabulary
-    filtering_expressions = filter_query.split(' && ')
-    for filter_part in filtering_expressions:
-        col_name, op, filter_value = split_filter_part(filter_part)
-
-        if op in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
-            vocabulary_view = [x for x in vocabulary_view if getattr(operator, op)(x[col_name], filter_value)]
-        elif op == 'contains':
-            vocabulary_view = [x for x in vocabulary_view if filter_value in str(x[col_name])]
-
-    if len(sort_by):
-        col = sort_by[0]['column_id']
-        descending = sort_by[0]['direction'] == 'desc'
-        vocabulary_view = sorted(vocabulary_view, key=lambda x: x[col], reverse=descending)
-
-    with open('sde_vocab.csv', encoding='utf-8', mode='w', newline='') as fo:
-        writer = csv.writer(fo)
-        writer.writerow(vocabulary_view[0].keys())
-        for item in vocabulary_view:
-            writer.writerow([str(item[k]) for k in item])
-    return dcc.send_file("sde_vocab.csv")
+def update_vocabulary_export(sort_by, filter_query):
+    return [
+        export_url('vocabulary', output['id']['format'], sort_by, filter_query)
+        for output in dash.callback_context.outputs_list
+    ]
 
 
 @app.callback(
@@ -568,87 +3068,126 @@ def download_vocabulary(n_clicks, sort_by, filter_query):
     [Input('wordstable', 'page_current'), Input('wordstable', 'sort_by'), Input('wordstable', 'filter_query')],
 )
 def update_wordstable(page_current, sort_by, filter_query):
-    vocabulary_view = vocabulary
-    filtering_expressions = filter_query.split(' && ')
-    for filter_part in filtering_expressions:
-        col_name, op, filter_value = split_filter_part(filter_part)
+    page_indices, num_rows = vocabulary_query.page(filter_query, sort_by, page_current, DATA_PAGE_SIZE)
+    return [
+        vocabulary.rows(page_indices),
+        math.ceil(num_rows / DATA_PAGE_SIZE),
+    ]
 
-        if op in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
-            vocabulary_view = [x for x in vocabulary_view if getattr(operator, op)(x[col_name], filter_value)]
-        elif op == 'contains':
-            vocabulary_view = [x for x in vocabulary_view if filter_value in str(x[col_name])]
-
-    if len(sort_by):
-        col = sort_by[0]['column_id']
-        descending = sort_by[0]['direction'] == 'desc'
-        vocabulary_view = sorted(vocabulary_view, key=lambda x: x[col], reverse=descending)
-    if page_current * DATA_PAGE_SIZE >= len(vocabulary_view):
-        page_current = len(vocabulary_view) // DATA_PAGE_SIZE
+
+@app.callback(
+    [Output('errorstable', 'data'), Output('errorstable', 'page_count')],
+    [Input('errorstable', 'page_current'), Input('errorstable', 'sort_by'), Input('errorstable', 'filter_query')],
+)
+def update_errorstable(page_current, sort_by, filter_query):
+    page_indices, num_rows = errors_query.page(filter_query, sort_by, page_current, DATA_PAGE_SIZE)
     return [
-        vocabulary_view[page_current * DATA_PAGE_SIZE : (page_current + 1) * DATA_PAGE_SIZE],
-        math.ceil(len(vocabulary_view) / DATA_PAGE_SIZE),
+        errors.rows(page_indices),
+        math.ceil(num_rows / DATA_PAGE_SIZE),
     ]
 
 
-samples_layout = [
-    dbc.Row(dbc.Col(html.H5('Data'), class_name='text-secondary'), class_name='mt-3'),
-    dbc.Row(
-        dbc.Col(
-            dash_table.DataTable(
-                id='datatable',
-                columns=[{'name': k.replace('_', ' '), 'id': k, 'hideable': True} for k in data[0]],
-                filter_action='custom',
-                filter_query='',
-                sort_action='custom',
-                sort_mode='single',
-                sort_by=[],
-                row_selectable='single',
-                selected_rows=[0],
-                page_action='custom',
-                page_current=0,
-                page_size=DATA_PAGE_SIZE,
-                page_count=math.ceil(len(data) / DATA_PAGE_SIZE),
-                style_cell={'overflow': 'hidden', 'textOverflow': 'ellipsis', 'maxWidth': 0, 'textAlign': 'center'},
-                style_header={
-                    'color': 'text-primary',
-                    'text_align': 'center',
-                    'height': 'auto',
-                    'whiteSpace': 'normal',
-                },
-                css=[
-                    {'selector': '.dash-spreadsheet-menu', 'rule': 'position:absolute; bottom: 8px'},
-                    {'selector': '.dash-filter--case', 'rule': 'display: none'},
-                    {'selector': '.column-header--hide', 'rule': 'display: none'},
-                ],
-            ),
-        )
-    ),
-] + [
-    dbc.Row(
-        [
+@app.callback(
+    Output({'type': 'export', 'table': 'errors', 'format': ALL}, 'href'),
+    [Input('errorstable', 'sort_by'), Input('errorstable', 'filter_query')],
+)
+def update_errors_export(sort_by, filter_query):
+    return [
+        export_url('errors', output['id']['format'], sort_by, filter_query)
+        for output in dash.callback_context.outputs_list
+    ]
+
+
+# links downloading the filtered and sorted rows of a table, their URLs follow filter and sorting of the table
+def make_export_links(table):
+    return [html.Span('Download:', className='me-2')] + [
+        html.A(EXPORT_FORMATS[k][0], id={'type': 'export', 'table': table, 'format': k}, href='', className='me-2')
+        for k in export_formats()
+    ]
+
+
+def export_url(table, export_format, sort_by, filter_query):
+    params = {'filter': filter_query or ''}
+    if sort_by:
+        params['sort'] = sort_by[0]['column_id']
+        params['direction'] = sort_by[0]['direction']
+    return app.get_relative_path('/export/{}.{}?{}'.format(table, export_format, urllib.parse.urlencode(params)))
+
+
+def make_samples_layout():
+    samples_layout = [
+        dbc.Row(dbc.Col(html.H5('Data'), class_name='text-secondary'), class_name='mt-3'),
+        dbc.Row(
             dbc.Col(
-                html.Div(children=k.replace('_', ' ')),
-                width=2,
-                class_name='mt-1 bg-light font-monospace text-break small rounded border',
-            ),
-            dbc.Col(html.Div(id='_' + k), class_name='mt-1 bg-light font-monospace text-break small rounded border'),
-        ]
-    )
-    for k in data[0]
-]
+                dash_table.DataTable(
+                    id='datatable',
+                    columns=[{'name': k.replace('_', ' '), 'id': k, 'hideable': True} for k in data.keys()],
+                    filter_action='custom',
+                    filter_query='',
+                    sort_action='custom',
+                    sort_mode='single',
+                    sort_by=[],
+                    row_selectable='single',
+                    selected_rows=[0],
+                    page_action='custom',
+                    page_current=0,
+                    page_size=DATA_PAGE_SIZE,
+                    page_count=math.ceil(len(data) / DATA_PAGE_SIZE),
+                    # restore filter, sorting and page when returning from the Statistics page
+                    persistence=True,
+                    persistence_type='memory',
+                    style_cell={
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis',
+                        'maxWidth': 0,
+                        'textAlign': 'center',
+                    },
+                    style_header={
+                        'color': 'text-primary',
+                        'text_align': 'center',
+                        'height': 'auto',
+                        'whiteSpace': 'normal',
+                    },
+                    css=[
+                        {'selector': '.dash-spreadsheet-menu', 'rule': 'position:absolute; bottom: 8px'},
+                        {'selector': '.dash-filter--case', 'rule': 'display: none'},
+                        {'selector': '.column-header--hide', 'rule': 'display: none'},
+                    ],
+                ),
+            )
+        ),
+        dbc.Row(dbc.Col(make_export_links('samples')), class_name='mt-2'),
+    ] + [
+        dbc.Row(
+            [
+                dbc.Col(
+                    html.Div(children=k.replace('_', ' ')),
+                    width=2,
+                    class_name='mt-1 bg-light font-monospace text-break small rounded border',
+                ),
+                dbc.Col(
+                    html.Div(id={'type': 'item-value', 'column': k}),
+                    class_name='mt-1 bg-light font-monospace text-break small rounded border',
+                ),
+            ]
+        )
+        for k in data.keys()
+    ]
 
-if metrics_available:
+    # diff of text and predictions of every model
+    diffs = [('text diff', 'pred_text')] if metrics_available else []
+    diffs += [('text diff ' + model['name'], model['pred']) for model in models]
     samples_layout += [
         dbc.Row(
             [
                 dbc.Col(
-                    html.Div(children='text diff'),
+                    html.Div(children=label),
                     width=2,
                     class_name='mt-1 bg-light font-monospace text-break small rounded border',
                 ),
                 dbc.Col(
                     html.Iframe(
-                        id='_diff',
+                        id={'type': 'diff', 'column': column},
                         sandbox='',
                         srcDoc='',
                         style={'border': 'none', 'width': '100%', 'height': '100%'},
@@ -658,88 +3197,288 @@ if metrics_available:
                 ),
             ]
         )
+        for label, column in diffs
+    ]
+    samples_layout += [
+        dbc.Row(dbc.Col(html.Audio(id='player', controls=True),), class_name='mt-3 '),
+        dbc.Row(dbc.Col(dcc.Graph(id='signal-graph')), class_name='mt-3'),
     ]
-samples_layout += [
-    dbc.Row(dbc.Col(html.Audio(id='player', controls=True),), class_name='mt-3 '),
-    dbc.Row(dbc.Col(dcc.Graph(id='signal-graph')), class_name='mt-3'),
-]
+    return samples_layout
 
 
 @app.callback(
     [Output('datatable', 'data'), Output('datatable', 'page_count')],
     [Input('datatable', 'page_current'), Input('datatable', 'sort_by'), Input('datatable', 'filter_query')],
 )
+@instrumented
 def update_datatable(page_current, sort_by, filter_query):
-    data_view = data
-    filtering_expressions = filter_query.split(' && ')
-    for filter_part in filtering_expressions:
-        col_name, op, filter_value = split_filter_part(filter_part)
+    page_indices, num_rows = data_query.page(filter_query, sort_by, page_current, DATA_PAGE_SIZE)
+    page = data.rows(page_indices)
+    for idx, row in zip(page_indices.tolist(), page):
+        row[ROW_INDEX_KEY] = idx
+    return [
+        page,
+        math.ceil(num_rows / DATA_PAGE_SIZE),
+    ]
 
-        if op in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
-            data_view = [x for x in data_view if getattr(operator, op)(x[col_name], filter_value)]
-        elif op == 'contains':
-            data_view = [x for x in data_view if filter_value in str(x[col_name])]
-
-    if len(sort_by):
-        col = sort_by[0]['column_id']
-        descending = sort_by[0]['direction'] == 'desc'
-        data_view = sorted(data_view, key=lambda x: x[col], reverse=descending)
-    if page_current * DATA_PAGE_SIZE >= len(data_view):
-        page_current = len(data_view) // DATA_PAGE_SIZE
+
+@app.callback(
+    Output({'type': 'export', 'table': 'samples', 'format': ALL}, 'href'),
+    [Input('datatable', 'sort_by'), Input('datatable', 'filter_query')],
+)
+def update_samples_export(sort_by, filter_query):
     return [
-        data_view[page_current * DATA_PAGE_SIZE : (page_current + 1) * DATA_PAGE_SIZE],
-        math.ceil(len(data_view) / DATA_PAGE_SIZE),
+        export_url('samples', output['id']['format'], sort_by, filter_query)
+        for output in dash.callback_context.outputs_list
     ]
 
 
-app.layout = html.Div(
-    [
-        dcc.Location(id='url', refresh=False),
-        dbc.NavbarSimple(
-            children=[
-                dbc.NavItem(dbc.NavLink('Statistics', id='stats_link', href='/', active=True)),
-                dbc.NavItem(dbc.NavLink('Samples', id='samples_link', href='/samples')),
+# filtered and sorted rows of samples, vocabulary or word errors table as a file which is written while it is
+# downloaded, the query is independent of the pages shown, so concurrent exports and browsing do not interfere
+@app.server.route(app.config.routes_pathname_prefix + 'export/<table>.<export_format>')
+def export_table(table, export_format):
+    if not loading_progress.ready:
+        flask.abort(503)
+    tables = {'samples': data, 'vocabulary': vocabulary, 'errors': errors}
+    if table not in tables or export_format not in export_formats():
+        flask.abort(404)
+    store = tables[table]
+    request_args = flask.request.args
+    sort_by = []
+    if request_args.get('sort'):
+        sort_by = [{'column_id': request_args['sort'], 'direction': request_args.get('direction', 'asc')}]
+    try:
+        indices = TableQuery(store).all(request_args.get('filter', ''), sort_by)
+    except (KeyError, ValueError):
+        flask.abort(400)
+    if table == 'samples':
+        # exact durations instead of the rounded ones shown in the table
+        store = ColumnStore(dict(data.columns, duration=row_stats['duration']))
+    if table == 'samples' and export_format == 'jsonl':
+        # manifest lines of the rows as they are written, a sub-manifest with the same fields and values
+        chunks = export_lines(manifest_lines, indices)
+    else:
+        chunks = export_rows(store, indices, export_format)
+    filename = '{}_{}.{}'.format(Path(args.manifest).stem, table, export_format)
+    return flask.Response(
+        chunks,
+        mimetype=EXPORT_FORMATS[export_format][1],
+        headers={'Content-Disposition': 'attachment; filename="{}"'.format(filename)},
+    )
+
+
+# page shown while data is loading, with progress of the current stage and statistics of lines parsed so far
+def make_loading_layout(progress):
+    layout = [dbc.Row(dbc.Col(html.H5('Loading Data'), class_name='text-secondary'), class_name='mt-3')]
+    if progress['error'] is not None:
+        return layout + [dbc.Row(dbc.Col(dbc.Alert(progress['error'], color='danger')), class_name='mt-2')]
+
+    fraction = progress['fraction']
+    details = []
+    if progress['lines'] > 0:
+        details.append('{} lines parsed, {:.0f} lines/s'.format(progress['lines'], progress['lines_per_sec']))
+    if progress['eta'] is not None:
+        details.append('{:.0f} s remaining'.format(progress['eta']))
+    layout += [
+        dbc.Row(dbc.Col(html.Div(progress['stage'] + '...')), class_name='mt-2'),
+        dbc.Row(
+            dbc.Col(
+                # amount of work of some stages is not known
+                dbc.Progress(
+                    value=100 if fraction is None else fraction * 100,
+                    label='' if fraction is None else '{:.0f}%'.format(fraction * 100),
+                    striped=fraction is None,
+                    animated=fraction is None,
+                )
+            ),
+            class_name='mt-2',
+        ),
+        dbc.Row(dbc.Col(html.Div(', '.join(details), className='text-secondary')), class_name='mt-2'),
+    ]
+    if progress['lines'] == 0:
+        return layout
+
+    counts = progress['counts']
+    values = [
+        ('Number of hours', '{:.2f} hours'.format(progress['hours'])),
+        ('Number of utterances', progress['lines']),
+    ]
+    if counts['num_pred'] > 0:
+        num_words = max(counts['wer_count'], 1)
+        num_chars = max(counts['cer_count'], 1)
+        values += [
+            ('Word Error Rate (WER), %', '{:.2f}'.format(counts['wer_dist'] / num_words * 100.0)),
+            ('Character Error Rate (CER), %', '{:.2f}'.format(counts['cer_dist'] / num_chars * 100.0)),
+            ('Word Match Rate (WMR), %', '{:.2f}'.format(counts['wmr_count'] / num_words * 100.0)),
+        ]
+    width = 12 // len(values)
+    layout += [
+        dbc.Row(
+            dbc.Col(html.H5('Statistics of lines parsed so far'), class_name='text-secondary'), class_name='mt-3'
+        ),
+        dbc.Row(
+            [
+                dbc.Col(html.Div(label, className='text-secondary'), width=width, class_name='border-end')
+                for label, _ in values
             ],
-            brand='Speech Data Explorer',
-            sticky='top',
-            color='green',
-            dark=True,
+            class_name='bg-light mt-2 rounded-top border-top border-start border-end',
+        ),
+        dbc.Row(
+            [
+                dbc.Col(
+                    html.H5(value, className='text-center p-1', style={'color': 'green', 'opacity': 0.7}),
+                    width=width,
+                    class_name='border-end',
+                )
+                for _, value in values
+            ],
+            class_name='bg-light rounded-bottom border-bottom border-start border-end',
         ),
-        dbc.Container(id='page-content'),
     ]
-)
+    if not progress['preview']:
+        return layout
+
+    # columns of the first rows, chunks may have different fields
+    columns = list(dict.fromkeys(k for row in progress['preview'] for k in row))
+    layout += [
+        dbc.Row(dbc.Col(html.H5('First lines parsed so far'), class_name='text-secondary'), class_name='mt-3'),
+        dbc.Row(
+            dbc.Col(
+                dash_table.DataTable(
+                    id='loading-table',
+                    columns=[{'name': k.replace('_', ' '), 'id': k} for k in columns],
+                    data=progress['preview'],
+                    style_cell={
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis',
+                        'maxWidth': 0,
+                        'textAlign': 'center',
+                    },
+                    style_header={
+                        'color': 'text-primary',
+                        'text_align': 'center',
+                        'height': 'auto',
+                        'whiteSpace': 'normal',
+                    },
+                ),
+            ),
+            class_name='mt-2',
+        ),
+    ]
+    return layout
+
+
+# layout is created per page load, progress is polled only until data is ready
+def serve_layout():
+    return html.Div(
+        [
+            dcc.Location(id='url', refresh=False),
+            dbc.NavbarSimple(
+                children=[
+                    dbc.NavItem(dbc.NavLink('Statistics', id='stats_link', href='/', active=True)),
+                    dbc.NavItem(dbc.NavLink('Samples', id='samples_link', href='/samples')),
+                ],
+                brand='Speech Data Explorer',
+                sticky='top',
+                color='green',
+                dark=True,
+            ),
+            dbc.Container(id='page-content'),
+            # filter of samples table, kept while the table is not displayed
+            dcc.Store(id='data-filter'),
+            dcc.Interval(id='loading-interval', interval=1000, disabled=loading_progress.ready),
+        ]
+    )
+
+
+app.layout = serve_layout
 
 
 @app.callback(
-    [Output('page-content', 'children'), Output('stats_link', 'active'), Output('samples_link', 'active')],
-    [Input('url', 'pathname')],
+    [
+        Output('page-content', 'children'),
+        Output('stats_link', 'active'),
+        Output('samples_link', 'active'),
+        Output('loading-interval', 'disabled'),
+    ],
+    [Input('url', 'pathname'), Input('loading-interval', 'n_intervals')],
 )
-def nav_click(url):
+def nav_click(url, n_intervals):
+    progress = loading_progress.snapshot()
+    if not progress['ready']:
+        # polling stops if loading failed
+        return [make_loading_layout(progress), url != '/samples', url == '/samples', progress['error'] is not None]
     if url == '/samples':
-        return [samples_layout, False, True]
+        return [samples_layout, False, True, True]
     else:
-        return [stats_layout, True, False]
+        return [stats_layout, True, False, True]
 
 
+@app.callback(Output('data-filter', 'data'), [Input('datatable', 'filter_query')])
+def store_filter(filter_query):
+    return filter_query
+
+
+# statistics of utterances matching filter of samples table, the layout shows statistics of all utterances
 @app.callback(
-    [Output('_' + k, 'children') for k in data[0]], [Input('datatable', 'selected_rows'), Input('datatable', 'data')]
+    [
+        Output('stats-title', 'children'),
+        Output('stats-hours', 'children'),
+        Output('stats-utterances', 'children'),
+        Output({'type': 'stats-metric', 'metric': ALL}, 'children'),
+        Output({'type': 'hist', 'column': ALL}, 'figure'),
+        Output({'type': 'model-metric', 'model': ALL, 'metric': ALL}, 'children'),
+    ],
+    [Input('data-filter', 'data')],
 )
-def show_item(idx, data):
-    if len(idx) == 0:
+def update_stats(filter_query):
+    if not filter_query:
         raise PreventUpdate
-    return [data[idx[0]][k] for k in data[0]]
+    indices = stats_query.all(filter_query, [])
+    metrics = rows_metrics(data, row_stats, indices)
+    _, _, _, metric_outputs, hist_outputs, model_outputs = dash.callback_context.outputs_list
+    # word accuracy needs word alignments, it is available for all utterances only
+    metric_values = [
+        '{:.2f}'.format(metrics[output['id']['metric']]) if output['id']['metric'] in metrics else '-'
+        for output in metric_outputs
+    ]
+    hist_figures = []
+    for output in hist_outputs:
+        k = output['id']['column']
+        label = figures_hist[k][2]
+        hist_figures.append(plot_histogram(compute_histogram(data[k][indices], edges=histograms[k][0]), label))
+    model_metrics = {name: rows_metrics(data, stats, indices) for name, stats in models_row_stats()}
+    model_values = []
+    for output in model_outputs:
+        metrics = model_metrics[output['id']['model']]
+        metric = output['id']['metric']
+        model_values.append('{:.2f}'.format(metrics[metric]) if metric in metrics else '-')
+    return [
+        'Statistics of utterances matching {}'.format(filter_query),
+        '{:.2f} hours'.format(metrics['hours']),
+        len(indices),
+        metric_values,
+        hist_figures,
+        model_values,
+    ]
 
 
-@app.callback(Output('_diff', 'srcDoc'), [Input('datatable', 'selected_rows'), Input('datatable', 'data')])
-def show_diff(idx, data):
-    if len(idx) == 0:
+@app.callback(
+    Output({'type': 'item-value', 'column': ALL}, 'children'),
+    [Input('datatable', 'selected_rows'), Input('datatable', 'data')],
+)
+@instrumented
+def show_item(idx, page_data):
+    if len(idx) == 0 or page_data is None or idx[0] >= len(page_data):
         raise PreventUpdate
+    item = data.row(page_data[idx[0]][ROW_INDEX_KEY])
+    return [item[output['id']['column']] for output in dash.callback_context.outputs_list]
 
-    orig_words = data[idx[0]]['text']
-    orig_words = '\n'.join(orig_words.split()) + '\n'
 
-    pred_words = data[idx[0]]['pred_text']
-    pred_words = '\n'.join(pred_words.split()) + '\n'
+# word diff of text and prediction as HTML
+def text_diff(text, pred_text):
+    orig_words = '\n'.join(text.split()) + '\n'
+    pred_words = '\n'.join(pred_text.split()) + '\n'
 
     diff = diff_match_patch.diff_match_patch()
     diff.Diff_Timeout = 0
@@ -755,28 +3494,99 @@ def show_diff(idx, data):
     return diff_html
 
 
-@app.callback(Output('signal-graph', 'figure'), [Input('datatable', 'selected_rows'), Input('datatable', 'data')])
-def plot_signal(idx, data):
+# word diff of text and prediction as HTML rendered from the edit script of their alignment computed at load time,
+# in the same format as text_diff, which is used if the script does not match the texts
+def alignment_diff(text, pred_text, script):
+    orig = text.split()
+    pred = pred_text.split()
+    if len(script) - script.count('I') != len(orig) or len(script) - script.count('D') != len(pred):
+        return text_diff(text, pred_text)
+    dmp = diff_match_patch.diff_match_patch()
+    orig = iter(orig)
+    pred = iter(pred)
+    diffs = []
+    changed = {dmp.DIFF_DELETE: [], dmp.DIFF_INSERT: []}
+    for op in script:
+        if op != '=':
+            if op != 'I':
+                changed[dmp.DIFF_DELETE].append(next(orig))
+            if op != 'D':
+                changed[dmp.DIFF_INSERT].append(next(pred))
+            continue
+        # deleted words of a changed run are followed by inserted ones
+        diffs += [(k, words) for k, words in changed.items() if words]
+        changed = {k: [] for k in changed}
+        word = next(orig)
+        next(pred)
+        if diffs and diffs[-1][0] == dmp.DIFF_EQUAL:
+            diffs[-1][1].append(word)
+        else:
+            diffs.append((dmp.DIFF_EQUAL, [word]))
+    diffs += [(k, words) for k, words in changed.items() if words]
+    return dmp.diff_prettyHtml([(k, ' '.join(words) + ' ') for k, words in diffs])
+
+
+@app.callback(
+    Output({'type': 'diff', 'column': ALL}, 'srcDoc'),
+    [Input('datatable', 'selected_rows'), Input('datatable', 'data')],
+)
+@instrumented
+def show_diff(idx, data):
     if len(idx) == 0:
         raise PreventUpdate
+    row = data[idx[0]]
+    # edit scripts of alignments of predictions of every model
+    alignments = {'pred_text': row_stats['alignment']}
+    alignments.update({model['pred']: model['row_stats']['alignment'] for model in models})
+    diffs = []
+    for output in dash.callback_context.outputs_list:
+        column = output['id']['column']
+        diffs.append(alignment_diff(row['text'], row[column] or '', alignments[column][row[ROW_INDEX_KEY]]))
+    return diffs
+
+
+@app.callback(
+    Output('signal-graph', 'figure'),
+    [Input('datatable', 'selected_rows'), Input('datatable', 'data'), Input('signal-graph', 'relayoutData')],
+)
+@instrumented
+def plot_signal(idx, data, relayout_data):
+    if len(idx) == 0:
+        raise PreventUpdate
+    view = None
+    if any(t['prop_id'] == 'signal-graph.relayoutData' for t in dash.callback_context.triggered):
+        # zoom re-renders visible part of signal in more detail, other layout changes are left to the browser
+        view = signal_view_range(relayout_data)
+        if view is None and not any(relayout_data.get(f'{axis}.autorange') for axis in ['xaxis', 'xaxis2']):
+            raise PreventUpdate
     figs = make_subplots(rows=2, cols=1, subplot_titles=('Waveform', 'Spectrogram'))
     try:
-        filename = absolute_audio_filepath(data[idx[0]]['audio_filepath'], args.manifest)
-        audio, fs = librosa.load(path=filename, sr=None)
-        if 'offset' in data[idx[0]]:
-            audio = audio[
-                int(data[idx[0]]['offset'] * fs) : int((data[idx[0]]['offset'] + data[idx[0]]['duration']) * fs)
-            ]
         time_stride = 0.01
-        hop_length = int(fs * time_stride)
         n_fft = 512
-        # linear scale spectrogram
-        s = librosa.stft(y=audio, n_fft=n_fft, hop_length=hop_length)
-        s_db = librosa.power_to_db(S=np.abs(s) ** 2, ref=np.max, top_db=100)
+        stored = load_stored_signal(data[idx[0]], n_fft, time_stride)
+        if stored is not None:
+            s_db, envelope, fs, num_samples = stored
+            s_db = s_db.T
+        else:
+            audio, fs = load_selected_audio(data[idx[0]])
+            s_db, _ = load_selected_spectrogram(data[idx[0]], n_fft, time_stride)
+            num_samples = len(audio)
+        if view is None:
+            start, end = 0, num_samples
+            start_frame, end_frame = 0, s_db.shape[1]
+        else:
+            start, end = max(int(view[0] * fs), 0), min(math.ceil(view[1] * fs), num_samples)
+            start_frame = max(int(view[0] / time_stride), 0)
+            end_frame = min(math.ceil(view[1] / time_stride) + 1, s_db.shape[1])
+        if stored is not None:
+            times, values = stored_envelope(envelope, fs, start, end)
+        else:
+            times, values = waveform_envelope(audio, fs, start, end)
+        s_lod, step = spectrogram_lod(s_db, start_frame, end_frame)
         figs.add_trace(
             go.Scatter(
-                x=np.arange(audio.shape[0]) / fs,
-                y=audio,
+                x=times,
+                y=values,
                 line={'color': 'green'},
                 name='Waveform',
                 hovertemplate='Time: %{x:.2f} s<br>Amplitude: %{y:.2f}<br><extra></extra>',
@@ -786,13 +3596,14 @@ def plot_signal(idx, data):
         )
         figs.add_trace(
             go.Heatmap(
-                z=s_db,
+                z=s_lod,
                 colorscale=[[0, 'rgb(30,62,62)'], [0.5, 'rgb(30,128,128)'], [1, 'rgb(30,255,30)'],],
                 colorbar=dict(yanchor='middle', lenmode='fraction', y=0.2, len=0.5, ticksuffix=' dB'),
-                dx=time_stride,
+                x0=start_frame * time_stride,
+                dx=time_stride * step,
                 dy=fs / n_fft / 1000,
                 name='Spectrogram',
-                hovertemplate='Time: %{x:.2f} s<br>Frequency: %{y:.2f} kHz<br>Magnitude: %{z:.2f} dB<extra></extra>',
+                hovertemplate='Time: %{x:.2f} s<br>Frequency: %{y:.2f} kHz<br>Magnitude: %{z} dB<extra></extra>',
             ),
             row=2,
             col=1,
@@ -802,33 +3613,159 @@ def plot_signal(idx, data):
         figs.update_yaxes(title_text='Amplitude', row=1, col=1)
         figs.update_xaxes(title_text='Time, s', row=2, col=1)
         figs.update_yaxes(title_text='Frequency, kHz', row=2, col=1)
+        if view is not None:
+            # keep both plots zoomed to the same time range
+            figs.update_xaxes(range=view)
     except Exception as ex:
         app.logger.error(f'ERROR in plot signal: {ex}')
+    app.logger.debug(f'audio cache: {audio_cache.stats()}')
 
     return figs
 
 
+# audio segment of manifest row, supports range requests so that the browser can start playback and seek early
+@app.server.route(app.config.routes_pathname_prefix + 'audio/<int:index>')
+@instrumented
+def serve_audio(index):
+    if not loading_progress.ready:
+        flask.abort(503)
+    audio_format = flask.request.args.get('format', args.audio_format)
+    if audio_format not in AUDIO_FORMATS or not 0 <= index < len(data):
+        flask.abort(404)
+    row = data.row(index)
+    key = ('encoded', audio_format) + audio_segment_key(row)
+    # row indexes change when the manifest is edited, so the browser revalidates cached audio by its segment
+    etag = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+    if etag in flask.request.if_none_match:
+        response = flask.Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    def compute():
+        signal, sr = load_selected_audio(row)
+        return (np.frombuffer(encode_audio(signal, sr, audio_format), dtype=np.uint8),)
+
+    try:
+        (encoded,) = audio_cache.get(key, compute)
+    except Exception as ex:
+        app.logger.error(f'ERROR in audio stream: {ex}')
+        flask.abort(500)
+    response = flask.Response(encoded.tobytes(), mimetype=AUDIO_FORMATS[audio_format][2])
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(flask.request, accept_ranges=True, complete_length=len(encoded))
+
+
 @app.callback(Output('player', 'src'), [Input('datatable', 'selected_rows'), Input('datatable', 'data')])
+@instrumented
 def update_player(idx, data):
     if len(idx) == 0:
         raise PreventUpdate
+    return app.get_relative_path('/audio/{}?format={}'.format(data[idx[0]][ROW_INDEX_KEY], args.audio_format))
+
+
+@app.server.before_request
+def start_request_timer():
+    flask.g.sde_request_start = time.perf_counter()
+
+
+# latency and size of responses of instrumented callbacks, the difference from latency of the callback is mostly
+# serialization of its output
+@app.server.after_request
+def observe_request(response):
+    callback = getattr(flask.g, 'sde_callback', None)
+    if callback is not None:
+        perf_metrics.observe('sde_request_seconds', callback, time.perf_counter() - flask.g.sde_request_start)
+        if response.content_length is not None:
+            perf_metrics.observe('sde_response_bytes', callback, response.content_length)
+    return response
+
+
+# performance metrics in Prometheus text format
+@app.server.route(app.config.routes_pathname_prefix + 'metrics')
+def serve_metrics():
+    cache_stats = audio_cache.stats()
+    memory = peak_memory()
+    gauges = {
+        'sde_data_ready': ('gauge', 'Whether data is loaded.', int(loading_progress.ready)),
+        'sde_rows': ('gauge', 'Number of rows of the samples table.', len(data) if loading_progress.ready else None),
+        'sde_peak_memory_bytes': ('gauge', 'Peak resident memory.', None if memory is None else int(memory * 2 ** 20)),
+        'sde_audio_cache_bytes': ('gauge', 'Size of values in the audio cache.', cache_stats['bytes']),
+        'sde_audio_cache_hits_total': ('counter', 'Hits of the audio cache.', cache_stats['hits']),
+        'sde_audio_cache_misses_total': ('counter', 'Misses of the audio cache.', cache_stats['misses']),
+        'sde_audio_cache_evictions_total': ('counter', 'Evictions from the audio cache.', cache_stats['evictions']),
+    }
+    return flask.Response(perf_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+
+def load_app_dataset():
+    global signal_store, figures_hist, stats_layout, samples_layout
+    load_dataset()
+    signal_store = SignalStore.load(signal_store_dir(args.manifest))
+    if signal_store is not None:
+        print('Using {} prepared audio segments'.format(len(signal_store)))
+    loading_progress.start('Plotting statistics')
+    with perf_metrics.stage('layouts'):
+        figures_hist = make_figures_hist()
+        stats_layout = make_stats_layout()
+        samples_layout = make_samples_layout()
+
+
+# data is loaded in the background so that the server responds immediately, pages show loading progress meanwhile
+def load_app_data():
     try:
-        filename = absolute_audio_filepath(data[idx[0]]['audio_filepath'], args.manifest)
-        signal, sr = librosa.load(path=filename, sr=None)
-        if 'offset' in data[idx[0]]:
-            signal = signal[
-                int(data[idx[0]]['offset'] * sr) : int((data[idx[0]]['offset'] + data[idx[0]]['duration']) * sr)
-            ]
-        with io.BytesIO() as buf:
-            # convert to PCM .wav
-            sf.write(buf, signal, sr, format='WAV')
-            buf.seek(0)
-            encoded = base64.b64encode(buf.read())
-        return 'data:audio/wav;base64,{}'.format(encoded.decode())
+        run_profiled(load_app_dataset, args.profile)
     except Exception as ex:
-        app.logger.error(f'ERROR in audio player: {ex}')
-        return ''
+        app.logger.exception(f'ERROR in loading data: {ex}')
+        loading_progress.finish('Loading data failed: {}'.format(ex))
+        return
+    loading_progress.finish()
+    print('Data is ready')
+
+
+# parse command line, argv is a list of arguments or None for sys.argv
+def configure(argv=None):
+    global args, audio_cache
+    args = parse_args(argv)
+    audio_cache = LRUCache(args.audio_cache_size * 2 ** 20)
+    app.title = os.path.basename(args.manifest)
+
+
+# app factory for WSGI servers with several worker processes, the command line is given as a string, e.g.
+#   gunicorn --preload -w 8 -b 0.0.0.0:8050 'run:create_app("/path/to/manifest.json --workers 16")'
+# data is loaded before the server is returned, with --preload it is loaded once by the master process and shared by
+# forked workers: columns of the metrics cache or the dataset are memory-mapped, other arrays are copy-on-write,
+# without --preload every worker loads memory-mapped columns of the cache written by the first one
+def create_app(command_line=''):
+    configure(shlex.split(command_line) if isinstance(command_line, str) else list(command_line))
+    if args.convert or args.prepare:
+        raise ValueError('--convert and --prepare are not supported by the app factory')
+    load_app_data()
+    if not loading_progress.ready:
+        raise RuntimeError(loading_progress.error)
+    return app.server
+
+
+def main():
+    configure()
+    if args.convert:
+        print('Loading data...')
+        load = functools.partial(
+            load_data, args.manifest, False, args.estimate_audio_metrics, None, args.workers, args.text_index
+        )
+        with metrics_cache_lock(args.manifest):
+            run_profiled(load, args.profile)
+            convert_dataset(args.manifest, args.convert)
+        print('Dataset is written to {}'.format(args.convert))
+        return
+    if args.prepare:
+        run_profiled(load_dataset, args.profile)
+        prepare_signal_store(data, args.manifest, args.workers)
+        return
+    print('Starting server...')
+    threading.Thread(target=load_app_data, daemon=True).start()
+    app.run_server(host='0.0.0.0', port=args.port, debug=args.debug)
 
 
 if __name__ == '__main__':
-    app.run_server(host='0.0.0.0', port=args.port, debug=args.debug)
\ No newline at end of file
+    main()